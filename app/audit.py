@@ -2,12 +2,12 @@
 Audit logging service for restoration requests.
 """
 import uuid
-import re
 from datetime import datetime, UTC
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from app.database import RestorationAuditLog, APIKey
+from app.service import TOKEN_RE
 
 
 async def log_restoration_request(
@@ -39,7 +39,7 @@ async def log_restoration_request(
         Created audit log record
     """
     # Count tokens in redacted text
-    token_count = len(re.findall(r"\[REDACTED_[a-z0-9]+\]", redacted_text))
+    token_count = len(TOKEN_RE.findall(redacted_text))
 
     audit_log = RestorationAuditLog()
     audit_log.id = str(uuid.uuid4())
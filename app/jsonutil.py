@@ -0,0 +1,34 @@
+"""
+JSON helpers for Ollama request and response bodies.
+
+Uses orjson when the optional ``speedups`` extra is installed and falls back
+to the stdlib json module otherwise.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup; stdlib json is the fallback
+    orjson = None
+
+# Headers for requests whose body was encoded with dumps()
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def loads(data):
+    """Decode JSON from str or bytes."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps(obj) -> bytes:
+    """Encode an object as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def strip_json_fence(text: str) -> str:
+    """Remove an optional ```json ... ``` markdown fence from an LLM reply in linear time."""
+    text = text.strip()
+    text = text.removeprefix("```json") if text.startswith("```json") else text.removeprefix("```")
+    return text.removesuffix("```").strip()
@@ -7,13 +7,14 @@ from app.schemas import (
 )
 from app.policy_schemas import PolicyResponse, AvailablePoliciesResponse
 from app.verification import verifier
-from app.service import redactor
+from app.service import redactor, get_redis
 from app.policies import PolicyEngine, GENERAL_POLICY, HEALTHCARE_POLICY, FINANCE_POLICY
 from app.policy_recommendation import policy_recommender
 from app.config import get_settings
 from app.database import get_session, init_database, APIKey as APIKeyModel
 from app.auth import validate_api_key, generate_api_key
 from app.audit import log_restoration_request, get_audit_logs
+from app import jsonutil
 from app.logging_config import get_logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
@@ -21,7 +22,6 @@ from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_
 from datetime import datetime, UTC
 import uuid
 import json
-import re
 import httpx
 import redis
 
@@ -64,6 +64,13 @@ async def startup_event():
     logger.info("Database initialized")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared outbound HTTP clients."""
+    await policy_recommender.aclose()
+    await verifier.aclose()
+
+
 def parse_llm_json_response(result_raw: str) -> dict:
     """
     Robust JSON parsing for LLM responses with fallback handling.
@@ -81,14 +88,11 @@ def parse_llm_json_response(result_raw: str) -> dict:
         if isinstance(result_raw, dict):
             return result_raw
 
-        # Clean markdown wrappers
-        clean_json = result_raw.strip()
-        clean_json = re.sub(r'^```json\s*', '', clean_json)
-        clean_json = re.sub(r'\s*```$', '', clean_json)
-        clean_json = clean_json.strip()
+        # Clean markdown wrappers (called for every audit in audit_redaction_task)
+        clean_json = jsonutil.strip_json_fence(result_raw)
 
         # Parse JSON
-        result = json.loads(clean_json)
+        result = jsonutil.loads(clean_json)
 
         # Validate expected structure
         if not isinstance(result, dict) or "leaked" not in result:
@@ -105,12 +109,47 @@ def parse_llm_json_response(result_raw: str) -> dict:
         return {"leaked": False, "reason": "Unexpected parsing error", "error": str(e)}
 
 
-async def audit_redaction_task(redacted_text: str, token_mapping_keys: list):
+# Keys per UNLINK call: bounds how long one command holds the Redis thread
+PURGE_CHUNK_SIZE = 128
+
+
+def purge_token_keys(db: redis.Redis, token_mapping_keys: list) -> int:
+    """
+    Remove leaked token mappings and their policy metadata from Redis.
+
+    Keys are UNLINKed in chunks of PURGE_CHUNK_SIZE so Redis reclaims the
+    memory in a background thread without one huge command stalling it,
+    and all chunks go out in a single pipeline round trip.
+
+    Args:
+        db: Redis client holding the token mappings
+        token_mapping_keys: Token keys to remove
+
+    Returns:
+        Number of token mappings that were still present and got removed
+    """
+    pipe = db.pipeline(transaction=False)
+    for i in range(0, len(token_mapping_keys), PURGE_CHUNK_SIZE):
+        chunk = token_mapping_keys[i:i + PURGE_CHUNK_SIZE]
+        pipe.unlink(*chunk)
+        pipe.unlink(*(f"{key}:policy" for key in chunk))
+    # Replies alternate mapping/policy counts; only the mapping counts are reported
+    return sum(pipe.execute()[::2])
+
+
+async def audit_redaction_task(
+    redacted_text: str,
+    token_mapping_keys: list,
+    db: Optional[redis.Redis] = None
+):
     """
     Background task for LLM-based PII leak detection with risk scoring.
 
     Supports both legacy boolean mode and new risk scoring mode based on configuration.
+    Leaked keys are purged from db (defaults to the shared redactor's Redis).
     """
+    db = redactor.db if db is None else db
+
     try:
         # Use risk scoring mode if enabled, otherwise legacy boolean mode
         use_risk_mode = settings.enable_risk_scoring
@@ -147,11 +186,7 @@ async def audit_redaction_task(redacted_text: str, token_mapping_keys: list):
                 )
 
                 try:
-                    purged_count = 0
-                    for key in token_mapping_keys:
-                        if redactor.db.delete(key):
-                            purged_count += 1
-                            redactor.db.delete(f"{key}:policy")
+                    purged_count = purge_token_keys(db, token_mapping_keys)
 
                     logger.info(f"Purged {purged_count}/{len(token_mapping_keys)} Redis keys")
                 except redis.RedisError as e:
@@ -184,11 +219,7 @@ async def audit_redaction_task(redacted_text: str, token_mapping_keys: list):
 
             # Purge leaked tokens
             try:
-                purged_count = 0
-                for key in token_mapping_keys:
-                    if redactor.db.delete(key):
-                        purged_count += 1
-                        redactor.db.delete(f"{key}:policy")
+                purged_count = purge_token_keys(db, token_mapping_keys)
 
                 logger.info(f"Purged {purged_count}/{len(token_mapping_keys)} Redis keys")
             except redis.RedisError as e:
@@ -212,7 +243,11 @@ async def audit_redaction_task(redacted_text: str, token_mapping_keys: list):
         logger.exception(f"Unexpected error in background audit", exc_info=e)
 
 @app.post("/redact")
-async def redact_data(request: RedactRequest, background_tasks: BackgroundTasks):
+async def redact_data(
+    request: RedactRequest,
+    background_tasks: BackgroundTasks,
+    db: redis.Redis = Depends(get_redis)
+):
     # 1. Determine policy to apply
     if settings.enable_policy_engine:
         # Load default policy based on configuration
@@ -241,11 +276,11 @@ async def redact_data(request: RedactRequest, background_tasks: BackgroundTasks)
         applied_policy = None
 
     # 2. Redact and get the keys created for THIS request
-    clean_text, scores, keys = redactor.redact_and_store(request.text, policy=applied_policy)
+    clean_text, scores, keys = redactor.redact_and_store(request.text, policy=applied_policy, db=db)
 
     # 3. Add the audit task to the background queue
     # We pass the 'keys' so the auditor knows exactly what to delete if it finds a leak
-    background_tasks.add_task(audit_redaction_task, clean_text, keys)
+    background_tasks.add_task(audit_redaction_task, clean_text, keys, db)
 
     # 4. Metrics
     REDACTION_COUNT.inc()
@@ -274,7 +309,8 @@ async def restore_data(
     request: Request,
     body: RestoreRequest,
     api_key_record: APIKeyModel = Depends(validate_api_key),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    db: redis.Redis = Depends(get_redis)
 ):
     """
     Restore redacted text from Redis tokens.
@@ -287,7 +323,7 @@ async def restore_data(
 
     try:
         # Attempt restoration (Issue 4: returns dict with warnings)
-        result = redactor.restore(body.redacted_text, check_policy=True)
+        result = redactor.restore(body.redacted_text, check_policy=True, db=db)
 
         # Log success
         await log_restoration_request(
@@ -548,7 +584,10 @@ def get_metrics():
 # ============================================================================
 
 @app.get("/health")
-async def health_check(session: AsyncSession = Depends(get_session)):
+async def health_check(
+    session: AsyncSession = Depends(get_session),
+    db: redis.Redis = Depends(get_redis)
+):
     """
     Health check endpoint for Kubernetes liveness/readiness probes.
 
@@ -571,7 +610,7 @@ async def health_check(session: AsyncSession = Depends(get_session)):
 
     # Check Redis (critical)
     try:
-        redactor.db.ping()
+        db.ping()
         health_status["checks"]["redis"] = {"status": "healthy"}
     except Exception as e:
         logger.error(f"Redis health check failed: {e}")
@@ -612,10 +651,13 @@ async def liveness_probe():
 
 
 @app.get("/health/ready")
-async def readiness_probe(session: AsyncSession = Depends(get_session)):
+async def readiness_probe(
+    session: AsyncSession = Depends(get_session),
+    db: redis.Redis = Depends(get_redis)
+):
     """Kubernetes readiness probe - ready to accept traffic."""
     try:
-        redactor.db.ping()
+        db.ping()
         await session.execute(select(1))
         return {"status": "ready"}
     except Exception as e:
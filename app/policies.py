@@ -5,25 +5,44 @@ Supports different policy contexts (healthcare, finance, general) with
 customizable entity filtering and restoration controls.
 """
 
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field, fields, replace
+from typing import FrozenSet, List, Optional, Dict, Tuple
 from presidio_analyzer import RecognizerResult
 
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RedactionPolicy:
     """
     Redaction policy configuration.
 
     Defines which PII entities to redact and restoration behavior
-    for a specific context.
+    for a specific context. Entity lists are stored as tuples and
+    snapshotted into frozensets at construction for O(1) membership checks.
     """
     context: str
-    enabled_entities: List[str] = field(default_factory=list)
-    disabled_entities: List[str] = field(default_factory=list)
+    enabled_entities: Tuple[str, ...] = ()
+    disabled_entities: Tuple[str, ...] = ()
     restoration_allowed: bool = True
     min_confidence_threshold: float = 0.0
     description: str = ""
+    _enabled_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _disabled_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Tuples keep the entity lists immutable, so the sets below can't go stale
+        object.__setattr__(self, "enabled_entities", tuple(self.enabled_entities))
+        object.__setattr__(self, "disabled_entities", tuple(self.disabled_entities))
+        object.__setattr__(self, "_enabled_set", frozenset(self.enabled_entities))
+        object.__setattr__(self, "_disabled_set", frozenset(self.disabled_entities))
+
+    @property
+    def enabled_set(self) -> FrozenSet[str]:
+        """Enabled entity types as a frozenset (empty means all are enabled)."""
+        return self._enabled_set
+
+    @property
+    def disabled_set(self) -> FrozenSet[str]:
+        """Disabled entity types as a frozenset."""
+        return self._disabled_set
 
     def is_entity_allowed(self, entity_type: str) -> bool:
         """
@@ -35,15 +54,10 @@ class RedactionPolicy:
         Returns:
             True if entity should be redacted, False otherwise
         """
-        # Disabled takes precedence over enabled
-        if entity_type in self.disabled_entities:
-            return False
-
-        # If enabled_entities is empty, allow all
-        if not self.enabled_entities:
-            return True
-
-        return entity_type in self.enabled_entities
+        # Disabled takes precedence over enabled; empty enabled set allows all
+        return entity_type not in self._disabled_set and (
+            not self._enabled_set or entity_type in self._enabled_set
+        )
 
     def meets_confidence_threshold(self, score: float) -> bool:
         """
@@ -58,6 +72,10 @@ class RedactionPolicy:
         return score >= self.min_confidence_threshold
 
 
+# Fields a request-level policy may override (excludes derived lookup fields)
+_POLICY_FIELDS = frozenset(f.name for f in fields(RedactionPolicy) if f.init)
+
+
 # Predefined policy contexts
 
 GENERAL_POLICY = RedactionPolicy(
@@ -126,13 +144,17 @@ class PolicyEngine:
     Manages policy loading, merging, and entity filtering.
     """
 
+    __slots__ = ("policies", "_contexts_cache")
+
     def __init__(self):
-        """Initialize policy engine with predefined policies."""
+        """Initialize policy engine with the shared predefined policies."""
         self.policies: Dict[str, RedactionPolicy] = {
             "general": GENERAL_POLICY,
             "healthcare": HEALTHCARE_POLICY,
             "finance": FINANCE_POLICY
         }
+        # Context names, rebuilt lazily after register_policy
+        self._contexts_cache: Optional[tuple] = None
 
     def load_policy(self, context: str) -> RedactionPolicy:
         """
@@ -147,12 +169,13 @@ class PolicyEngine:
         Raises:
             ValueError: If context not found
         """
-        if context not in self.policies:
+        try:
+            return self.policies[context]
+        except KeyError:
             raise ValueError(
                 f"Unknown policy context: {context}. "
                 f"Available: {list(self.policies.keys())}"
-            )
-        return self.policies[context]
+            ) from None
 
     def merge_policies(
         self,
@@ -163,7 +186,7 @@ class PolicyEngine:
         Merge request-level policy overrides with global policy.
 
         Request policies can override specific fields. Missing fields
-        inherit from global policy.
+        inherit from global policy; unknown keys are ignored.
 
         Args:
             global_policy: Base policy from configuration
@@ -175,17 +198,8 @@ class PolicyEngine:
         if not request_policy:
             return global_policy
 
-        # Start with global policy as base
-        merged = RedactionPolicy(
-            context=request_policy.get("context", global_policy.context),
-            enabled_entities=request_policy.get("enabled_entities", global_policy.enabled_entities),
-            disabled_entities=request_policy.get("disabled_entities", global_policy.disabled_entities),
-            restoration_allowed=request_policy.get("restoration_allowed", global_policy.restoration_allowed),
-            min_confidence_threshold=request_policy.get("min_confidence_threshold", global_policy.min_confidence_threshold),
-            description=request_policy.get("description", global_policy.description)
-        )
-
-        return merged
+        overrides = {k: v for k, v in request_policy.items() if k in _POLICY_FIELDS}
+        return replace(global_policy, **overrides) if overrides else global_policy
 
     def filter_entities(
         self,
@@ -206,20 +220,20 @@ class PolicyEngine:
         Returns:
             Filtered list of RecognizerResult
         """
-        filtered = []
-
-        for result in analyzer_results:
-            # Check if entity type is allowed
-            if not policy.is_entity_allowed(result.entity_type):
-                continue
-
-            # Check confidence threshold
-            if not policy.meets_confidence_threshold(result.score):
-                continue
+        # Pass-through policy: nothing can be filtered out
+        enabled = policy.enabled_set
+        disabled = policy.disabled_set
+        if not enabled and not disabled and policy.min_confidence_threshold <= 0.0:
+            return list(analyzer_results)
 
-            filtered.append(result)
+        threshold = policy.min_confidence_threshold
 
-        return filtered
+        return [
+            result for result in analyzer_results
+            if result.entity_type not in disabled
+            and (not enabled or result.entity_type in enabled)
+            and result.score >= threshold
+        ]
 
     def register_policy(self, policy: RedactionPolicy):
         """
@@ -229,6 +243,7 @@ class PolicyEngine:
             policy: Custom RedactionPolicy to register
         """
         self.policies[policy.context] = policy
+        self._contexts_cache = None
 
     def get_available_contexts(self) -> List[str]:
         """
@@ -237,4 +252,6 @@ class PolicyEngine:
         Returns:
             List of context names
         """
-        return list(self.policies.keys())
+        if self._contexts_cache is None:
+            self._contexts_cache = tuple(self.policies)
+        return list(self._contexts_cache)
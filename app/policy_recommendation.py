@@ -3,12 +3,29 @@ Policy recommendation service using LLM-based domain detection.
 
 Analyzes text content to suggest the most appropriate policy context.
 """
+import copy
+import hashlib
 import httpx
-import json
+from collections import OrderedDict
+from pydantic import ValidationError
+from app import jsonutil
 from app.config import get_settings
+from app.schemas import LLMPolicySuggestion
 from app.prompts.policy_prompts import get_policy_recommendation_prompt
 
 
+# Number of successful LLM suggestions kept per service instance
+SUGGESTION_CACHE_SIZE = 1024
+
+# Domain keywords for the offline fallback; counted once each, as substrings
+_HEALTHCARE_KEYWORDS = frozenset(
+    ["patient", "doctor", "hospital", "medical", "diagnosis", "treatment", "phi", "hipaa"]
+)
+_FINANCE_KEYWORDS = frozenset(
+    ["credit card", "payment", "transaction", "account", "bank", "financial", "pci", "invoice"]
+)
+
+
 class PolicyRecommendationService:
     """
     LLM-powered service for recommending policy contexts based on text analysis.
@@ -20,6 +37,33 @@ class PolicyRecommendationService:
         self.ollama_url = self.settings.ollama_url
         self.model = self.settings.ollama_model
         self.timeout = self.settings.ollama_timeout
+        self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[bytes, dict] = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client (called on application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def clear_cache(self):
+        """Drop all memoized suggestions."""
+        self._cache.clear()
+
+    def _remember(self, key: bytes, result: dict):
+        """Store a successful suggestion, evicting the least recently used one."""
+        self._cache[key] = copy.deepcopy(result)
+        if len(self._cache) > SUGGESTION_CACHE_SIZE:
+            self._cache.popitem(last=False)
 
     async def suggest_policy(self, text: str) -> dict:
         """
@@ -37,100 +81,75 @@ class PolicyRecommendationService:
             - alternative_contexts: list[str]
             - risk_warning: str | None
         """
+        # Identical text gets the same answer; only LLM successes are cached
+        cache_key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return copy.deepcopy(cached)
+
         # Generate prompt
         prompt = get_policy_recommendation_prompt(text)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    self.ollama_url,
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "format": "json"
-                    }
-                )
-
-                if response.status_code == 200:
-                    result_str = response.json().get("response")
-
-                    # Parse JSON response
-                    try:
-                        result = self._parse_json_response(result_str)
-
-                        # Validate required fields
-                        if not self._validate_response(result):
-                            return self._get_default_recommendation(text)
-
-                        return result
-
-                    except json.JSONDecodeError as e:
-                        # Fallback to default recommendation
-                        return self._get_default_recommendation(text)
-
-                else:
+        client = self._get_client()
+        try:
+            # Stream NDJSON chunks so decoding overlaps token generation
+            async with client.stream(
+                "POST",
+                self.ollama_url,
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True,
+                    "format": "json"
+                }
+            ) as response:
+                if response.status_code != 200:
                     # Return default recommendation on error
                     return self._get_default_recommendation(text)
 
-            except httpx.TimeoutException:
-                return self._get_default_recommendation(text, error="LLM timeout")
+                parts = []
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = jsonutil.loads(line)
+                    parts.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        break
 
-            except Exception as e:
-                return self._get_default_recommendation(text, error=str(e))
+            # Parse and validate JSON response in one pass
+            try:
+                result = self._parse_json_response("".join(parts))
+            except ValidationError:
+                # Malformed JSON, missing fields or unknown context
+                return self._get_default_recommendation(text)
+
+            self._remember(cache_key, result)
+            return result
+
+        except httpx.TimeoutException:
+            return self._get_default_recommendation(text, error="LLM timeout")
+
+        except Exception as e:
+            return self._get_default_recommendation(text, error=str(e))
 
     def _parse_json_response(self, response_str: str) -> dict:
         """
-        Parse LLM JSON response with markdown wrapper handling.
+        Parse and validate LLM JSON response with markdown wrapper handling.
 
         Args:
             response_str: Raw response string from LLM
 
         Returns:
-            Parsed dictionary
+            Validated recommendation dictionary
 
         Raises:
-            json.JSONDecodeError: If JSON is invalid
+            ValidationError: If JSON is invalid or does not match LLMPolicySuggestion
         """
         # Clean markdown wrappers
-        import re
-        clean_json = response_str.strip()
-        clean_json = re.sub(r'^```json\s*', '', clean_json)
-        clean_json = re.sub(r'\s*```$', '', clean_json)
-        clean_json = clean_json.strip()
-
-        return json.loads(clean_json)
+        clean_json = jsonutil.strip_json_fence(response_str)
 
-    def _validate_response(self, result: dict) -> bool:
-        """
-        Validate that response contains required fields.
-
-        Args:
-            result: Parsed response dictionary
-
-        Returns:
-            True if valid, False otherwise
-        """
-        required_fields = ["recommended_context", "confidence", "reasoning", "detected_domains"]
-
-        # Check required fields exist
-        if not all(field in result for field in required_fields):
-            return False
-
-        # Validate context is valid
-        valid_contexts = ["general", "healthcare", "finance"]
-        if result["recommended_context"] not in valid_contexts:
-            return False
-
-        # Validate confidence is in range
-        try:
-            confidence = float(result["confidence"])
-            if not 0.0 <= confidence <= 1.0:
-                return False
-        except (ValueError, TypeError):
-            return False
-
-        return True
+        return LLMPolicySuggestion.model_validate_json(clean_json).model_dump()
 
     def _get_default_recommendation(self, text: str, error: str = None) -> dict:
         """
@@ -146,13 +165,8 @@ class PolicyRecommendationService:
         # Simple keyword-based fallback
         text_lower = text.lower()
 
-        # Healthcare keywords
-        healthcare_keywords = ["patient", "doctor", "hospital", "medical", "diagnosis", "treatment", "phi", "hipaa"]
-        # Finance keywords
-        finance_keywords = ["credit card", "payment", "transaction", "account", "bank", "financial", "pci", "invoice"]
-
-        healthcare_score = sum(1 for kw in healthcare_keywords if kw in text_lower)
-        finance_score = sum(1 for kw in finance_keywords if kw in text_lower)
+        healthcare_score = sum(1 for kw in _HEALTHCARE_KEYWORDS if kw in text_lower)
+        finance_score = sum(1 for kw in _FINANCE_KEYWORDS if kw in text_lower)
 
         if healthcare_score > finance_score and healthcare_score >= 2:
             context = "healthcare"
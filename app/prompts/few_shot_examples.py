@@ -3,6 +3,8 @@ Curated few-shot examples for LLM prompt engineering.
 
 These examples teach the LLM to detect PII leaks in redacted text.
 """
+from functools import lru_cache
+
 
 # Few-shot examples for leak detection
 FEW_SHOT_EXAMPLES = [
@@ -85,6 +87,7 @@ def format_example_for_prompt(example: dict, include_analysis: bool = True) -> s
     return result
 
 
+@lru_cache(maxsize=None)
 def get_formatted_examples(count: int = 3, include_analysis: bool = True) -> str:
     """
     Get formatted examples for prompt.
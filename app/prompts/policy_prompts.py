@@ -127,6 +127,12 @@ Now analyze the provided text and return your recommendation in JSON format.
 """
 
 
+# Template halves around {text}, with {{ }} escapes resolved once at import
+_PROMPT_PREFIX, _PROMPT_SUFFIX = (
+    part.format() for part in POLICY_RECOMMENDATION_PROMPT.split("{text}")
+)
+
+
 def get_policy_recommendation_prompt(text: str) -> str:
     """
     Get policy recommendation prompt for given text.
@@ -137,4 +143,4 @@ def get_policy_recommendation_prompt(text: str) -> str:
     Returns:
         Formatted prompt string
     """
-    return POLICY_RECOMMENDATION_PROMPT.format(text=text)
+    return _PROMPT_PREFIX + text + _PROMPT_SUFFIX
@@ -140,6 +140,23 @@ Return ONLY valid JSON:
 """
 
 
+def _split_template(template: str) -> tuple:
+    """Split a template around {text}, resolving its {{ }} escapes once at import."""
+    prefix, suffix = template.split("{text}")
+    return prefix.format(), suffix.format()
+
+
+_BASIC_V1 = _split_template(BASIC_PROMPT_V1)
+_BASIC_RISK_V1 = _split_template(BASIC_RISK_PROMPT_V1)
+_COT_V2 = _split_template(CHAIN_OF_THOUGHT_PROMPT_V2)
+_COT_RISK_V2 = _split_template(CHAIN_OF_THOUGHT_RISK_PROMPT_V2)
+
+
+def _fill(halves: tuple, text: str) -> str:
+    """Insert text between pre-split template halves."""
+    return halves[0] + text + halves[1]
+
+
 # Version 3: Few-Shot Learning (Legacy - Boolean)
 def get_few_shot_prompt_v3(text: str, num_examples: int = 3) -> str:
     """
@@ -309,6 +326,19 @@ Risk levels: 0.0-0.3=allow, 0.3-0.5=allow, 0.5-0.7=alert, 0.7-1.0=purge
 JSON only:"""
 
 
+# (version, risk_mode) -> builder(text, num_examples), resolved once at import
+_PROMPT_BUILDERS = {
+    ("v1_basic", True): lambda text, num_examples: _fill(_BASIC_RISK_V1, text),
+    ("v2_cot", True): lambda text, num_examples: _fill(_COT_RISK_V2, text),
+    ("v3_few_shot", True): get_few_shot_risk_prompt_v3,
+    ("v4_optimized", True): lambda text, num_examples: get_optimized_risk_prompt_v4(text),
+    ("v1_basic", False): lambda text, num_examples: _fill(_BASIC_V1, text),
+    ("v2_cot", False): lambda text, num_examples: _fill(_COT_V2, text),
+    ("v3_few_shot", False): get_few_shot_prompt_v3,
+    ("v4_optimized", False): lambda text, num_examples: get_optimized_few_shot_prompt_v4(text),
+}
+
+
 def get_prompt(version: str, text: str, risk_mode: bool = False, **kwargs) -> str:
     """
     Get prompt by version with support for risk scoring mode.
@@ -322,35 +352,9 @@ def get_prompt(version: str, text: str, risk_mode: bool = False, **kwargs) -> st
     Returns:
         Formatted prompt string
     """
-    # Risk scoring mode
-    if risk_mode:
-        if version == "v1_basic":
-            return BASIC_RISK_PROMPT_V1.format(text=text)
-        elif version == "v2_cot":
-            return CHAIN_OF_THOUGHT_RISK_PROMPT_V2.format(text=text)
-        elif version == "v3_few_shot":
-            num_examples = kwargs.get("num_examples", 3)
-            return get_few_shot_risk_prompt_v3(text, num_examples)
-        elif version == "v4_optimized":
-            return get_optimized_risk_prompt_v4(text)
-        else:
-            # Default to basic risk prompt
-            return BASIC_RISK_PROMPT_V1.format(text=text)
-
-    # Legacy boolean leak detection mode
-    else:
-        if version == "v1_basic":
-            return BASIC_PROMPT_V1.format(text=text)
-        elif version == "v2_cot":
-            return CHAIN_OF_THOUGHT_PROMPT_V2.format(text=text)
-        elif version == "v3_few_shot":
-            num_examples = kwargs.get("num_examples", 3)
-            return get_few_shot_prompt_v3(text, num_examples)
-        elif version == "v4_optimized":
-            return get_optimized_few_shot_prompt_v4(text)
-        else:
-            # Default to basic
-            return BASIC_PROMPT_V1.format(text=text)
+    # Unknown versions fall back to the basic prompt for the requested mode
+    builder = _PROMPT_BUILDERS.get((version, risk_mode)) or _PROMPT_BUILDERS[("v1_basic", risk_mode)]
+    return builder(text, kwargs.get("num_examples", 3))
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 import uuid
 from app.policy_schemas import PolicyRequest, PolicyResponse
@@ -216,4 +216,9 @@ class PolicySuggestionResponse(BaseModel):
     risk_warning: Optional[str] = Field(
         None,
         description="Warning if text contains cross-domain PII"
-    )
\ No newline at end of file
+    )
+
+
+class LLMPolicySuggestion(PolicySuggestionResponse):
+    """Policy recommendation parsed from the LLM reply; context must be a known policy."""
+    recommended_context: Literal["general", "healthcare", "finance"]
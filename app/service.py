@@ -1,16 +1,22 @@
+import re
 import redis
-import uuid
-from typing import Optional
-from presidio_analyzer import AnalyzerEngine
+import secrets
+import threading
+from typing import List, Optional
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, RecognizerResult
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 from app.policies import PolicyEngine, RedactionPolicy
 from app.config import get_settings
 
+# Matches redaction tokens such as [REDACTED_1a2b3c4d5e6f7a8b]
+TOKEN_RE = re.compile(r"\[REDACTED_[a-z0-9]+\]")
+
 class RedactorService:
     # Issue 5 fix: Class-level singleton instances to prevent reloading 500MB model
     _analyzer_instance = None
     _anonymizer_instance = None
+    _engine_lock = threading.Lock()
 
     def __init__(self, policy_engine: Optional[PolicyEngine] = None):
         # Use lazy-loaded singleton instances
@@ -36,20 +42,54 @@ class RedactorService:
     def _get_analyzer(cls):
         """Lazy-load AnalyzerEngine as singleton (500MB model)."""
         if cls._analyzer_instance is None:
-            print("Initializing Presidio AnalyzerEngine (one-time load)...")
-            cls._analyzer_instance = AnalyzerEngine()
-            print("AnalyzerEngine ready")
+            # Double-checked so concurrent first callers load the model only once
+            with cls._engine_lock:
+                if cls._analyzer_instance is None:
+                    print("Initializing Presidio AnalyzerEngine (one-time load)...")
+                    cls._analyzer_instance = AnalyzerEngine()
+                    print("AnalyzerEngine ready")
         return cls._analyzer_instance
 
     @classmethod
     def _get_anonymizer(cls):
         """Lazy-load AnonymizerEngine as singleton."""
         if cls._anonymizer_instance is None:
-            cls._anonymizer_instance = AnonymizerEngine()
+            with cls._engine_lock:
+                if cls._anonymizer_instance is None:
+                    cls._anonymizer_instance = AnonymizerEngine()
         return cls._anonymizer_instance
 
-    def redact_and_store(self, text: str, policy: Optional[RedactionPolicy] = None):
-        results = self.analyzer.analyze(text=text, language='en')
+    def analyze_batch(self, texts: List[str], batch_size: int = 32) -> List[List[RecognizerResult]]:
+        """
+        Run Presidio analysis over many texts in one pass.
+
+        spaCy processes the texts with nlp.pipe(), so pipeline overhead is
+        paid per batch instead of per text.
+
+        Args:
+            texts: Texts to analyze
+            batch_size: Number of texts handed to spaCy per batch
+
+        Returns:
+            One list of RecognizerResult per input text, in input order
+        """
+        batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+        return batch_analyzer.analyze_iterator(texts, language='en', batch_size=batch_size)
+
+    def redact_and_store(
+        self,
+        text: str,
+        policy: Optional[RedactionPolicy] = None,
+        analyzer_results: Optional[List[RecognizerResult]] = None,
+        db: Optional[redis.Redis] = None
+    ):
+        db = self.db if db is None else db
+
+        # Callers that batch-analyzed up front (see analyze_batch) skip per-text NER
+        if analyzer_results is None:
+            results = self.analyzer.analyze(text=text, language='en')
+        else:
+            results = analyzer_results
 
         # Apply policy filtering if policy is provided
         if policy:
@@ -57,22 +97,21 @@ class RedactorService:
         
         # This list will track ONLY the keys created in THIS specific function call
         created_keys = []
-        
+        # (key, value) writes, flushed in one pipeline once anonymization is done
+        pending_writes = []
+
         def store_in_redis(pii_text):
-            token_id = uuid.uuid4().hex[:16]  # Issue 1 fix: 16 chars prevents collisions
+            token_id = secrets.token_hex(8)  # Issue 1 fix: 16 chars (64 random bits) prevents collisions
             token = f"[REDACTED_{token_id}]"
 
             # Store PII mapping with policy metadata
-            # Store restoration permission alongside the PII value
-            value_with_metadata = pii_text
             if policy:
                 # Store metadata in separate key for restoration validation
-                meta_key = f"{token}:policy"
                 meta_value = f"{policy.context}:{policy.restoration_allowed}"
-                self.db.set(meta_key, meta_value, ex=86400)
+                pending_writes.append((f"{token}:policy", meta_value))
 
-            # Save mapping and track the key
-            self.db.set(token, value_with_metadata, ex=86400)
+            # Queue mapping and track the key
+            pending_writes.append((token, pii_text))
             created_keys.append(token)
             return token
 
@@ -81,13 +120,25 @@ class RedactorService:
             analyzer_results=results,
             operators={"DEFAULT": OperatorConfig("custom", {"lambda": store_in_redis})}
         )
-        
+
+        # One round-trip for every SET ... EX, regardless of entity count
+        if pending_writes:
+            pipe = db.pipeline(transaction=False)
+            for key, value in pending_writes:
+                pipe.set(key, value, ex=86400)
+            pipe.execute()
+
         scores = [res.score for res in results]
         
         # Return the keys alongside the text and scores
         return anonymized_result.text, scores, created_keys
 
-    def restore(self, redacted_text: str, check_policy: bool = True) -> dict:
+    def restore(
+        self,
+        redacted_text: str,
+        check_policy: bool = True,
+        db: Optional[redis.Redis] = None
+    ) -> dict:
         """
         Restore redacted text from Redis tokens.
 
@@ -97,6 +148,7 @@ class RedactorService:
         Args:
             redacted_text: Text with [REDACTED_xxxx] tokens
             check_policy: If True, check policy metadata before restoration
+            db: Redis client to read tokens from (defaults to self.db)
 
         Returns:
             dict with:
@@ -105,19 +157,23 @@ class RedactorService:
             - tokens_missing: List of missing token IDs
             - warnings: Warning messages
         """
-        import re
-        tokens = re.findall(r"\[REDACTED_[a-z0-9]+\]", redacted_text)
+        db = self.db if db is None else db
+        tokens = TOKEN_RE.findall(redacted_text)
         restored_text = redacted_text
 
         tokens_found = 0
         tokens_missing = []
         warnings = []
 
+        # Fetch every mapping (and policy metadata key) in one MGET round-trip
+        unique_tokens = list(dict.fromkeys(tokens))
+        keys = unique_tokens + ([f"{token}:policy" for token in unique_tokens] if check_policy else [])
+        stored = dict(zip(keys, db.mget(keys))) if keys else {}
+
         for token in tokens:
             # Check policy metadata if requested
             if check_policy:
-                meta_key = f"{token}:policy"
-                meta_value = self.db.get(meta_key)
+                meta_value = stored[f"{token}:policy"]
                 if meta_value:
                     # Parse metadata: "context:restoration_allowed"
                     parts = meta_value.split(":")
@@ -131,7 +187,7 @@ class RedactorService:
                             )
 
             # Attempt restoration
-            original_value = self.db.get(token)
+            original_value = stored[token]
             if original_value:
                 restored_text = restored_text.replace(token, original_value)
                 tokens_found += 1
@@ -146,4 +202,9 @@ class RedactorService:
             "warnings": warnings
         }
 
-redactor = RedactorService()
\ No newline at end of file
+redactor = RedactorService()
+
+
+def get_redis() -> redis.Redis:
+    """FastAPI dependency returning the Redis client used for token storage."""
+    return redactor.db
@@ -4,10 +4,24 @@ LLM-based verification agent for detecting PII leaks in redacted text.
 Uses advanced prompt engineering techniques (few-shot, chain-of-thought)
 to improve leak detection accuracy.
 """
+import hashlib
+import re
 import httpx
+from collections import OrderedDict
+from app import jsonutil
 from app.config import get_settings
+from app.service import TOKEN_RE
 from app.prompts.verification_prompts import get_prompt
 
+# Verdict field in a partially streamed leak-check reply
+_LEAKED_RE = re.compile(r'"leaked"\s*:\s*(true|false)')
+
+# Characters of already searched reply kept in view, so a verdict split across chunks still matches
+_VERDICT_OVERLAP = 32
+
+# Number of completed LLM verdicts kept per agent instance
+VERDICT_CACHE_SIZE = 10_000
+
 
 class VerificationAgent:
     """
@@ -23,6 +37,54 @@ class VerificationAgent:
         self.model = self.settings.ollama_model
         self.timeout = self.settings.ollama_timeout
         self.prompt_version = self.settings.prompt_version
+        self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client (called on application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def clear_cache(self):
+        """Drop all memoized verdicts."""
+        self._cache.clear()
+
+    def _remember(self, key: bytes, result: str):
+        """Store a completed verdict, evicting the least recently used one."""
+        self._cache[key] = result
+        if len(self._cache) > VERDICT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _rule_based_precheck(redacted_text: str) -> str | None:
+        """
+        Clear texts that hold nothing but redaction tokens without the LLM.
+
+        Only the clean verdict is decided here. Whether visible PII is a leak
+        depends on the redaction policy, so every other text goes to the LLM.
+
+        Args:
+            redacted_text: Text that has been redacted
+
+        Returns:
+            JSON verdict string for token-only text, otherwise None
+        """
+        if not any(ch.isalnum() for ch in TOKEN_RE.sub("", redacted_text)):
+            return jsonutil.dumps({
+                "leaked": False,
+                "reason": "Rule-based precheck: text holds only redaction tokens"
+            }).decode()
+        return None
 
     async def check_for_leaks(self, redacted_text: str, prompt_version: str = None, risk_mode: bool = False) -> dict:
         """
@@ -38,9 +100,25 @@ class VerificationAgent:
             If risk_mode=True: Dictionary with 'risk_score' (float), 'risk_factors' (list),
                                'recommended_action' (str), 'confidence' (float)
         """
+        # Token-only texts skip the LLM; risk scores always come from the model
+        if not risk_mode:
+            verdict = self._rule_based_precheck(redacted_text)
+            if verdict is not None:
+                return verdict
+
         # Use specified version or default from config
         version = prompt_version or self.prompt_version
 
+        # Texts differing only in token ids share a verdict; only LLM replies are cached
+        normalized = TOKEN_RE.sub("[REDACTED]", redacted_text)
+        cache_key = hashlib.blake2b(
+            f"{version}|{risk_mode}|".encode() + normalized.encode(), digest_size=16
+        ).digest()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
         # Generate prompt using advanced prompting system
         prompt = get_prompt(
             version=version,
@@ -49,32 +127,69 @@ class VerificationAgent:
             num_examples=self.settings.few_shot_examples_count
         )
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    self.ollama_url,
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "format": "json"
-                    }
-                )
-
-                if response.status_code == 200:
-                    # Return the JSON response string (will be parsed by caller)
-                    return response.json().get("response")
-                else:
+        client = self._get_client()
+        try:
+            # Stream NDJSON chunks so an early leak verdict ends the wait
+            async with client.stream(
+                "POST",
+                self.ollama_url,
+                content=jsonutil.dumps({
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True,
+                    "format": "json"
+                }),
+                headers=jsonutil.JSON_HEADERS
+            ) as response:
+                if response.status_code != 200:
                     # Return safe default on error as JSON string for consistency
-                    import json
-                    return json.dumps({"leaked": False, "error": f"HTTP {response.status_code}"})
-
-            except httpx.TimeoutException:
-                import json
-                return json.dumps({"leaked": False, "error": "Timeout waiting for LLM response"})
-            except Exception as e:
-                import json
-                return json.dumps({"leaked": False, "error": str(e)})
+                    return jsonutil.dumps({"leaked": False, "error": f"HTTP {response.status_code}"}).decode()
+
+                reply = ""
+                verdict_seen = risk_mode
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = jsonutil.loads(line)
+                    piece = chunk.get("response", "")
+                    reply += piece
+                    if chunk.get("done"):
+                        break
+
+                    if not verdict_seen:
+                        # Only the new chunk and a short overlap can hold a verdict not seen before
+                        match = _LEAKED_RE.search(reply, max(0, len(reply) - len(piece) - _VERDICT_OVERLAP))
+                        if match:
+                            verdict_seen = True
+                            if match.group(1) == "true":
+                                try:
+                                    # Whole reply already arrived (non-streamed body), possibly fenced
+                                    jsonutil.loads(jsonutil.strip_json_fence(reply))
+                                    self._remember(cache_key, reply)
+                                    return reply
+                                except ValueError:
+                                    # Leak confirmed; don't wait for the explanation. The placeholder
+                                    # stays uncached so a repeat check gets the LLM's real reason
+                                    return jsonutil.dumps({
+                                        "leaked": True,
+                                        "reason": "Leak reported by LLM (stream ended before reason)"
+                                    }).decode()
+
+            # Return the JSON response string (will be parsed by caller)
+            result = reply
+            try:
+                # Malformed replies stay uncached so a retry gets a fresh answer
+                jsonutil.loads(jsonutil.strip_json_fence(result))
+                self._remember(cache_key, result)
+            except ValueError:
+                pass
+            return result
+
+        except httpx.TimeoutException:
+            return jsonutil.dumps({"leaked": False, "error": "Timeout waiting for LLM response"}).decode()
+        except (httpx.HTTPError, ValueError) as e:
+            # Transport failures and malformed stream lines; anything else is a bug and propagates
+            return jsonutil.dumps({"leaked": False, "error": str(e)}).decode()
 
 
 # Global verifier instance
@@ -3,8 +3,10 @@ Metrics calculation for PII redaction evaluation.
 
 Computes precision, recall, F1 score, and entity-level metrics.
 """
+from collections import Counter
 from typing import List, Dict, Tuple
-import re
+import numpy as np
+from app.service import TOKEN_RE
 
 
 def extract_predicted_entities(original_text: str, redacted_text: str, scores: List[float]) -> List[Dict]:
@@ -19,31 +21,20 @@ def extract_predicted_entities(original_text: str, redacted_text: str, scores: L
     Returns:
         List of predicted entities with positions
     """
-    predictions = []
-
     # Find all redaction tokens
-    tokens = list(re.finditer(r'\[REDACTED_[a-z0-9]+\]', redacted_text))
-
-    # Track position offset as we iterate
-    offset = 0
-    pred_idx = 0
-
-    for match in tokens:
-        token_start = match.start()
-        token_end = match.end()
-        token_text = match.group()
-
-        # Find corresponding text in original
-        # This is approximate since we don't know exact boundaries
-        # We'll mark the position where the token appears
-        predictions.append({
-            "start": token_start,
-            "end": token_end,
-            "text": token_text,
-            "score": scores[pred_idx] if pred_idx < len(scores) else 0.0,
+    # Positions are approximate since we don't know exact boundaries in the
+    # original; we mark the position where each token appears
+    n_scores = len(scores)
+    predictions = [
+        {
+            "start": match.start(),
+            "end": match.end(),
+            "text": match.group(),
+            "score": scores[i] if i < n_scores else 0.0,
             "type": "REDACTED"  # Type unknown without analyzer results
-        })
-        pred_idx += 1
+        }
+        for i, match in enumerate(TOKEN_RE.finditer(redacted_text))
+    ]
 
     return predictions
 
@@ -153,6 +144,50 @@ def calculate_metrics(true_positives: int, false_positives: int, false_negatives
     }
 
 
+def calculate_metrics_batch(
+    true_positives: np.ndarray,
+    false_positives: np.ndarray,
+    false_negatives: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate precision, recall, and F1 score element-wise over count arrays.
+
+    Vectorized counterpart of calculate_metrics for aggregating many groups
+    (e.g. categories) at once. Zero denominators yield 0.0, as in the scalar
+    version.
+
+    Args:
+        true_positives: Array of true positive counts
+        false_positives: Array of false positive counts
+        false_negatives: Array of false negative counts
+
+    Returns:
+        Dictionary of arrays with precision, recall, F1, and counts
+    """
+    tp = np.asarray(true_positives, dtype=float)
+    fp = np.asarray(false_positives, dtype=float)
+    fn = np.asarray(false_negatives, dtype=float)
+
+    precision = np.divide(tp, tp + fp, out=np.zeros_like(tp), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros_like(tp), where=(tp + fn) > 0)
+    precision_plus_recall = precision + recall
+    f1 = np.divide(
+        2 * precision * recall,
+        precision_plus_recall,
+        out=np.zeros_like(tp),
+        where=precision_plus_recall > 0
+    )
+
+    return {
+        "precision": np.round(precision, 4),
+        "recall": np.round(recall, 4),
+        "f1": np.round(f1, 4),
+        "true_positives": np.asarray(true_positives),
+        "false_positives": np.asarray(false_positives),
+        "false_negatives": np.asarray(false_negatives)
+    }
+
+
 def calculate_metrics_by_type(all_matches: List[Dict], all_fps: List[Dict], all_fns: List[Dict]) -> Dict:
     """
     Calculate metrics broken down by entity type.
@@ -165,30 +200,16 @@ def calculate_metrics_by_type(all_matches: List[Dict], all_fps: List[Dict], all_
     Returns:
         Dictionary mapping entity type to metrics
     """
-    type_metrics = {}
-
     # Count by ground truth type
-    type_counts = {"tp": {}, "fp": {}, "fn": {}}
-
-    # True positives
-    for match in all_matches:
-        entity_type = match["ground_truth"]["type"]
-        type_counts["tp"][entity_type] = type_counts["tp"].get(entity_type, 0) + 1
-
-    # False negatives (missed entities)
-    for fn in all_fns:
-        entity_type = fn["type"]
-        type_counts["fn"][entity_type] = type_counts["fn"].get(entity_type, 0) + 1
+    tp_counts = Counter(match["ground_truth"]["type"] for match in all_matches)
+    fn_counts = Counter(fn["type"] for fn in all_fns)
 
     # Calculate metrics per type
-    all_types = set(list(type_counts["tp"].keys()) + list(type_counts["fn"].keys()))
-
-    for entity_type in all_types:
-        tp = type_counts["tp"].get(entity_type, 0)
-        fp = 0  # Hard to attribute FPs to specific type without predictions having types
-        fn = type_counts["fn"].get(entity_type, 0)
-
-        type_metrics[entity_type] = calculate_metrics(tp, fp, fn)
+    # FPs are hard to attribute to a specific type without predictions having types
+    type_metrics = {
+        entity_type: calculate_metrics(tp_counts[entity_type], 0, fn_counts[entity_type])
+        for entity_type in tp_counts.keys() | fn_counts.keys()
+    }
 
     return type_metrics
 
@@ -203,8 +224,6 @@ def calculate_latency_metrics(latencies: List[float]) -> Dict:
     Returns:
         Dictionary with p50, p95, p99, mean, max
     """
-    import numpy as np
-
     if not latencies:
         return {"p50": 0, "p95": 0, "p99": 0, "mean": 0, "max": 0}
 
@@ -232,27 +251,20 @@ def create_confusion_matrix_data(all_matches: List[Dict], all_fps: List[Dict], a
         Dictionary with confusion matrix data
     """
     # Count entity types
-    detected_types = {}
-    missed_types = {}
+    detected_types = Counter(match["ground_truth"]["type"] for match in all_matches)
+    missed_types = Counter(fn["type"] for fn in all_fns)
 
-    for match in all_matches:
-        entity_type = match["ground_truth"]["type"]
-        detected_types[entity_type] = detected_types.get(entity_type, 0) + 1
+    all_types = sorted(detected_types.keys() | missed_types.keys())
 
-    for fn in all_fns:
-        entity_type = fn["type"]
-        missed_types[entity_type] = missed_types.get(entity_type, 0) + 1
-
-    all_types = sorted(set(list(detected_types.keys()) + list(missed_types.keys())))
-
-    matrix_data = []
-    for entity_type in all_types:
-        matrix_data.append({
+    matrix_data = [
+        {
             "type": entity_type,
-            "detected": detected_types.get(entity_type, 0),
-            "missed": missed_types.get(entity_type, 0),
-            "total": detected_types.get(entity_type, 0) + missed_types.get(entity_type, 0)
-        })
+            "detected": detected_types[entity_type],
+            "missed": missed_types[entity_type],
+            "total": detected_types[entity_type] + missed_types[entity_type]
+        }
+        for entity_type in all_types
+    ]
 
     return {
         "types": all_types,
@@ -1,23 +1,62 @@
 """
 Pytest configuration and fixtures for testing PII redaction system.
 """
+import copy
+import json
+import os
+import re
+from datetime import datetime, UTC
+
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock
 import fakeredis
 import respx
-from httpx import Response
+from httpx import ASGITransport, AsyncClient, Response
+from presidio_analyzer import RecognizerResult
 
+# One fake Redis server per process: pytest-xdist workers each import this module
+# separately, so they never share keyspace.
+_FAKE_REDIS_SERVER = fakeredis.FakeServer()
 
-@pytest.fixture
+# Fixed timestamp for fixture API keys; no test asserts on wall-clock creation time
+_FROZEN_NOW = datetime(2024, 1, 1, tzinfo=UTC)
+
+# Stand-in DB session for the app's get_session override; execute/commit/refresh do nothing
+_PROTOTYPE_SESSION = AsyncMock()
+_PROTOTYPE_SESSION.execute = AsyncMock(return_value=AsyncMock())
+_PROTOTYPE_SESSION.commit = AsyncMock()
+_PROTOTYPE_SESSION.refresh = AsyncMock()
+
+
+@pytest.fixture(scope="session")
 def mock_redis():
-    """Provides a fake Redis instance for testing."""
-    return fakeredis.FakeRedis(decode_responses=True)
+    """Provides a fake Redis instance shared across the test session (one server per xdist worker)."""
+    return fakeredis.FakeStrictRedis(server=_FAKE_REDIS_SERVER, decode_responses=True)
 
 
-@pytest.fixture
-def mock_redactor_service(mock_redis):
-    """Provides a RedactorService instance with mocked Redis."""
+@pytest.fixture(autouse=True)
+def reset_redis(mock_redis):
+    """Wipes the shared fake Redis after every test."""
+    yield
+    mock_redis.flushall()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_caches():
+    """Clears memoized policy suggestions and leak verdicts so mocked Ollama replies apply per test."""
+    from app.policy_recommendation import policy_recommender
+    from app.verification import verifier
+
+    yield
+    policy_recommender.clear_cache()
+    verifier.clear_cache()
+
+
+@pytest.fixture(scope="session")
+def mock_redactor_service(mock_redis, warm_analyzer):
+    """Provides a RedactorService instance with mocked Redis (built once per session)."""
     from app.service import RedactorService
 
     service = RedactorService()
@@ -25,53 +64,195 @@ def mock_redactor_service(mock_redis):
     return service
 
 
-@pytest.fixture
-def mock_ollama_api():
-    """Mock Ollama API responses using respx."""
+OLLAMA_URL = "http://ollama:11434/api/generate"
+# Canned Ollama replies, encoded once at import and reused for every mocked call
+OLLAMA_JSON_HEADERS = {"content-type": "application/json"}
+OLLAMA_CLEAN_RESP = Response(
+    200,
+    content=json.dumps({"response": '{"leaked": false, "reason": "Clean"}'}).encode(),
+    headers=OLLAMA_JSON_HEADERS
+)
+OLLAMA_LEAK_RESP = Response(
+    200,
+    content=json.dumps({"response": '{"leaked": true, "reason": "Email leaked"}'}).encode(),
+    headers=OLLAMA_JSON_HEADERS
+)
+OLLAMA_GENERAL_SUGGEST_RESP = Response(
+    200,
+    content=json.dumps({
+        "response": json.dumps({
+            "recommended_context": "general",
+            "confidence": 0.8,
+            "reasoning": "Generic communication with basic PII",
+            "detected_domains": ["general"],
+            "alternative_contexts": [],
+            "risk_warning": None
+        })
+    }).encode(),
+    headers=OLLAMA_JSON_HEADERS
+)
+
+
+# Prompt marker identifying policy-recommendation calls (see app/prompts/policy_prompts.py)
+POLICY_ADVISOR_PROMPT = "Privacy Policy Advisor"
+
+# Per-test Ollama replies keyed by a prompt substring; cleared after every test
+_OLLAMA_REPLIES = {}
+
+
+def _dispatch_ollama(request):
+    """Answers a mocked Ollama call: per-test replies first, then the canned default."""
+    prompt = json.loads(request.content).get("prompt", "")
+    for prompt_marker, reply in _OLLAMA_REPLIES.items():
+        if prompt_marker in prompt:
+            return reply
+    if POLICY_ADVISOR_PROMPT in prompt:
+        return OLLAMA_GENERAL_SUGGEST_RESP
+    return OLLAMA_CLEAN_RESP
+
+
+@pytest.fixture(scope="session", autouse=True)
+def session_respx():
+    """Starts respx once per session with a single Ollama route.
+
+    Tests that open their own ``with respx.mock:`` block get a snapshot of this
+    router; routes they add are rolled back when the block exits.
+    """
     with respx.mock:
-        yield respx
+        yield respx.post(OLLAMA_URL).mock(side_effect=_dispatch_ollama)
+
+
+@pytest.fixture(autouse=True)
+def mock_ollama_default(request, session_respx):
+    """Routes Ollama to a clean audit response for every test.
+
+    Mark a test with ``ollama_leak`` to get a leak response instead, or with
+    ``no_ollama_mock`` to let Ollama calls pass through unmocked. Tests that
+    never reach Ollama can be marked ``no_ollama`` to skip the per-test reset.
+    Tests needing a different reply register it through ``ollama_replies``.
+    """
+    if request.node.get_closest_marker("no_ollama"):
+        yield session_respx
+        return
+
+    if request.node.get_closest_marker("no_ollama_mock"):
+        with respx.mock:
+            yield respx.post(OLLAMA_URL).pass_through()
+        return
+
+    if request.node.get_closest_marker("ollama_leak"):
+        _OLLAMA_REPLIES[""] = OLLAMA_LEAK_RESP
+
+    session_respx.reset()
+    yield session_respx
+    _OLLAMA_REPLIES.clear()
 
 
 @pytest.fixture
-def test_client(mock_redis):
-    """Provides a FastAPI TestClient with mocked dependencies."""
-    # Patch Redis in the service module before importing main
-    with patch('app.service.redis.Redis', return_value=mock_redis):
-        from app.main import app
-        from app.service import redactor
-        from app.auth import validate_api_key
-        from app.database import APIKey, get_session
-        from datetime import datetime, UTC
-        from unittest.mock import AsyncMock
-        import uuid
-
-        # Replace the redactor's db with our mock
-        redactor.db = mock_redis
-
-        # Override the validate_api_key dependency to return a mock API key
-        async def mock_validate_api_key():
-            mock_key = APIKey()
-            mock_key.id = str(uuid.uuid4())
-            mock_key.key_hash = "test"
-            mock_key.service_name = "test_service"
-            mock_key.created_at = datetime.now(UTC)
-            mock_key.revoked = False
-            mock_key.usage_count = 0
-            return mock_key
-
-        # Mock database session
-        async def mock_get_session():
-            mock_session = AsyncMock()
-            # Make execute and commit do nothing
-            mock_session.execute = AsyncMock(return_value=AsyncMock())
-            mock_session.commit = AsyncMock()
-            mock_session.refresh = AsyncMock()
-            yield mock_session
-
-        app.dependency_overrides[validate_api_key] = mock_validate_api_key
-        app.dependency_overrides[get_session] = mock_get_session
-
-        return TestClient(app)
+def ollama_replies():
+    """Maps prompt substrings to the Ollama reply returned for this test only."""
+    return _OLLAMA_REPLIES
+
+
+@pytest.fixture(scope="session")
+def _app_instance(mock_redis, warm_analyzer):
+    """Imports the FastAPI app (and builds the Presidio engines) once per session."""
+    # Importing main builds the shared redactor and its Presidio engines
+    from app.main import app
+    from app.service import get_redis
+    from app.auth import validate_api_key
+    from app.database import APIKey, get_session
+    import uuid
+
+    # Override the validate_api_key dependency to return a copy of one prototype API key
+    prototype_key = APIKey()
+    prototype_key.id = str(uuid.uuid4())
+    prototype_key.key_hash = "test"
+    prototype_key.service_name = "test_service"
+    prototype_key.created_at = _FROZEN_NOW
+    prototype_key.revoked = False
+    prototype_key.usage_count = 0
+
+    async def mock_validate_api_key():
+        return copy.copy(prototype_key)
+
+    # Mock database session (one shared prototype; call history is reset per test)
+    async def mock_get_session():
+        yield _PROTOTYPE_SESSION
+
+    app.dependency_overrides[get_redis] = lambda: mock_redis
+    app.dependency_overrides[validate_api_key] = mock_validate_api_key
+    app.dependency_overrides[get_session] = mock_get_session
+
+    return app
+
+
+@pytest.fixture
+def test_client(_app_instance):
+    """Provides a FastAPI TestClient over the shared app; per-test overrides are undone afterwards."""
+    saved_overrides = dict(_app_instance.dependency_overrides)
+    yield TestClient(_app_instance)
+    _app_instance.dependency_overrides.clear()
+    _app_instance.dependency_overrides.update(saved_overrides)
+    _PROTOTYPE_SESSION.reset_mock()
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def async_client(_app_instance):
+    """Provides an httpx AsyncClient bound to the shared app, reused across a test module."""
+    async with AsyncClient(transport=ASGITransport(app=_app_instance), base_url="http://test") as client:
+        yield client
+
+
+class FakeAnalyzer:
+    """Regex-only stand-in for Presidio's AnalyzerEngine (emails, US phones, SSNs)."""
+
+    _PATTERN = re.compile(
+        r"(?P<EMAIL_ADDRESS>[\w.+-]+@[\w-]+\.[\w.-]+)"
+        r"|(?P<PHONE_NUMBER>\d{3}-\d{3}-\d{4})"
+        r"|(?P<US_SSN>\d{3}-\d{2}-\d{4})"
+    )
+    _SCORES = {"EMAIL_ADDRESS": 1.0, "PHONE_NUMBER": 0.75, "US_SSN": 0.85}
+
+    def analyze(self, text, language="en", **kwargs):
+        return [
+            RecognizerResult(
+                entity_type=match.lastgroup,
+                start=match.start(),
+                end=match.end(),
+                score=self._SCORES[match.lastgroup],
+            )
+            for match in self._PATTERN.finditer(text)
+        ]
+
+
+@pytest.fixture
+def fake_analyzer(request, monkeypatch):
+    """Swaps the shared redactor's Presidio analyzer for FakeAnalyzer.
+
+    Tests marked ``real_presidio`` keep the real engine.
+    """
+    if request.node.get_closest_marker("real_presidio"):
+        yield None
+        return
+
+    from app.service import redactor
+
+    analyzer = FakeAnalyzer()
+    monkeypatch.setattr(redactor, "analyzer", analyzer)
+    yield analyzer
+
+
+@pytest.fixture(scope="session")
+def warm_analyzer():
+    """Runs one real Presidio analysis so the NLP pipeline is warm before the first test.
+
+    Requested only by fixtures that need the analyzer, so pure unit modules
+    (e.g. test_policies.py) run without loading spaCy.
+    """
+    from app.service import redactor
+
+    redactor.analyzer.analyze(text="Warmup: contact john@example.com", language="en")
 
 
 @pytest.fixture
@@ -141,47 +322,103 @@ def environment_vars(monkeypatch):
     monkeypatch.setenv("ENABLE_API_KEY_AUTH", "false")
 
 
+@pytest.fixture(scope="module")
+def ollama_test_settings():
+    """Points settings at the mocked Ollama once per module, instead of reloading per test."""
+    from app.config import reload_settings
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("OLLAMA_URL", OLLAMA_URL)
+        mp.setenv("OLLAMA_MODEL", "phi3")
+        reload_settings()
+        yield
+
+
 # Database test fixtures
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from app.database import Base, APIKey
-from datetime import datetime, UTC
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from app.database import Base, APIKey, get_session
 import uuid
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def test_db_engine():
-    """In-memory SQLite for tests."""
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    """In-memory SQLite for tests; the schema is created once per session."""
+    # Named shared-cache in-memory DB per xdist worker, held open by a single pooled connection
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///file:sentinel_test_{worker}?mode=memory&cache=shared&uri=true",
+        echo=False,
+        poolclass=StaticPool,
+    )
+
+    # pysqlite's implicit transaction handling breaks SAVEPOINTs; let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield engine
     await engine.dispose()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture(loop_scope="session")
 async def test_db_session(test_db_engine):
-    """Test database session."""
-    async_session_maker_test = async_sessionmaker(
-        test_db_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session_maker_test() as session:
-        yield session
+    """Test database session wrapped in a transaction that is rolled back after each test."""
+    async with test_db_engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
 
 
 @pytest.fixture
-async def test_api_key(test_db_session):
-    """Create test API key."""
+def override_db(_app_instance, test_db_session):
+    """Routes the app's get_session dependency to the per-test DB session."""
+    previous = _app_instance.dependency_overrides.get(get_session)
+
+    async def override_get_session():
+        yield test_db_session
+
+    _app_instance.dependency_overrides[get_session] = override_get_session
+    yield test_db_session
+    if previous is None:
+        _app_instance.dependency_overrides.pop(get_session, None)
+    else:
+        _app_instance.dependency_overrides[get_session] = previous
+
+
+@pytest.fixture(scope="session")
+def _cached_raw_key_hash():
+    """Generates one (raw_key, key_hash) pair for the whole session."""
     from app.auth import generate_api_key
 
-    raw_key, key_hash = generate_api_key()
+    return generate_api_key()
+
+
+@pytest.fixture
+async def test_api_key(test_db_session, _cached_raw_key_hash):
+    """Create test API key."""
+    raw_key, key_hash = _cached_raw_key_hash
     api_key = APIKey()
     api_key.id = str(uuid.uuid4())
     api_key.key_hash = key_hash
     api_key.service_name = "test_service"
     api_key.description = "Test key"
     api_key.revoked = False
-    api_key.created_at = datetime.now(UTC)
+    api_key.created_at = _FROZEN_NOW
     api_key.usage_count = 0
 
     test_db_session.add(api_key)
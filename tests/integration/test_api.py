@@ -1,151 +1,113 @@
 """
 Integration tests for FastAPI endpoints.
 """
+import asyncio
+
 import pytest
-import respx
-from httpx import Response
 import time
 
+from app.service import TOKEN_RE
+
+# Request body reused across tests, serialized once at import
+_CLEAN_TEXT_BODY = b'{"text": "Email: test@example.com"}'
+_JSON_HEADERS = {"content-type": "application/json"}
 
+
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.usefixtures("fake_analyzer")
 class TestRedactEndpoint:
     """Test suite for /redact endpoint."""
 
-    def test_redact_endpoint_success(self, test_client):
+    async def test_redact_endpoint_success(self, async_client):
         """Test successful redaction request."""
-        with respx.mock:
-            # Mock Ollama API for background audit
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": "Contact john.doe@example.com for more info"}
-            )
+        response = await async_client.post(
+            "/redact",
+            json={"text": "Contact john.doe@example.com for more info"}
+        )
 
-            assert response.status_code == 200
-            data = response.json()
+        assert response.status_code == 200
+        data = response.json()
 
-            # Verify response structure
-            assert "redacted_text" in data
-            assert "confidence_scores" in data
-            assert "audit_status" in data
+        # Verify response structure
+        assert "redacted_text" in data
+        assert "confidence_scores" in data
+        assert "audit_status" in data
 
-            # Verify redaction occurred
-            assert "john.doe@example.com" not in data["redacted_text"]
-            assert "[REDACTED_" in data["redacted_text"]
+        # Verify redaction occurred
+        assert "john.doe@example.com" not in data["redacted_text"]
+        assert "[REDACTED_" in data["redacted_text"]
 
-            # Verify audit status
-            assert data["audit_status"] == "queued"
+        # Verify audit status
+        assert data["audit_status"] == "queued"
 
-            # Verify confidence scores
-            assert isinstance(data["confidence_scores"], list)
-            assert len(data["confidence_scores"]) > 0
+        # Verify confidence scores
+        assert isinstance(data["confidence_scores"], list)
+        assert len(data["confidence_scores"]) > 0
 
-    def test_redact_endpoint_multiple_entities(self, test_client):
+    @pytest.mark.real_presidio
+    async def test_redact_endpoint_multiple_entities(self, async_client):
         """Test redaction with multiple PII entities."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": "Jane Doe's email is jane@example.com and phone is 555-1234"}
-            )
+        response = await async_client.post(
+            "/redact",
+            json={"text": "Jane Doe's email is jane@example.com and phone is 555-1234"}
+        )
 
-            assert response.status_code == 200
-            data = response.json()
+        assert response.status_code == 200
+        data = response.json()
 
-            # Multiple entities should be redacted
-            assert "jane@example.com" not in data["redacted_text"]
-            assert len(data["confidence_scores"]) >= 2
+        # Multiple entities should be redacted
+        assert "jane@example.com" not in data["redacted_text"]
+        assert len(data["confidence_scores"]) >= 2
 
-    def test_redact_endpoint_no_pii(self, test_client):
+    async def test_redact_endpoint_no_pii(self, async_client):
         """Test redaction with text containing no PII."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "No PII found"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": "This is a clean text with no personal information."}
-            )
+        response = await async_client.post(
+            "/redact",
+            json={"text": "This is a clean text with no personal information."}
+        )
 
-            assert response.status_code == 200
-            data = response.json()
+        assert response.status_code == 200
+        data = response.json()
 
-            # Text should remain unchanged
-            assert "This is a clean text" in data["redacted_text"]
-            assert data["confidence_scores"] == []
+        # Text should remain unchanged
+        assert "This is a clean text" in data["redacted_text"]
+        assert data["confidence_scores"] == []
 
-    def test_redact_endpoint_empty_text(self, test_client):
+    async def test_redact_endpoint_empty_text(self, async_client):
         """Test redaction with empty text."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Empty"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": ""}
-            )
+        response = await async_client.post(
+            "/redact",
+            json={"text": ""}
+        )
 
-            assert response.status_code == 200
-            data = response.json()
-            assert data["redacted_text"] == ""
+        assert response.status_code == 200
+        data = response.json()
+        assert data["redacted_text"] == ""
 
-    def test_redact_endpoint_background_audit_queued(self, test_client):
+    async def test_redact_endpoint_background_audit_queued(self, async_client):
         """Test that background audit task is queued."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": "Email: test@example.com"}
-            )
+        response = await async_client.post(
+            "/redact",
+            content=_CLEAN_TEXT_BODY,
+            headers=_JSON_HEADERS
+        )
 
-            assert response.status_code == 200
-            data = response.json()
+        assert response.status_code == 200
+        data = response.json()
 
-            # Audit should be queued
-            assert data["audit_status"] == "queued"
+        # Audit should be queued
+        assert data["audit_status"] == "queued"
 
-    def test_redact_endpoint_unicode(self, test_client):
+    @pytest.mark.real_presidio
+    async def test_redact_endpoint_unicode(self, async_client):
         """Test redaction with Unicode characters."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            response = test_client.post(
-                "/redact",
-                json={"text": "Contact José García at josé@example.com"}
-            )
+        response = await async_client.post(
+            "/redact",
+            json={"text": "Contact José García at josé@example.com"}
+        )
 
-            assert response.status_code == 200
-            assert response.json()["redacted_text"]  # Should handle Unicode
+        assert response.status_code == 200
+        assert response.json()["redacted_text"]  # Should handle Unicode
 
 
 class TestRestoreEndpoint:
@@ -153,38 +115,30 @@ class TestRestoreEndpoint:
 
     def test_restore_endpoint_success(self, test_client):
         """Test successful restoration of redacted text."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            # First redact some text with restoration enabled
-            redact_response = test_client.post(
-                "/redact",
-                json={
-                    "text": "Contact john@example.com",
-                    "policy": {"restoration_allowed": True}
-                }
-            )
-
-            assert redact_response.status_code == 200
-            redacted_text = redact_response.json()["redacted_text"]
-
-            # Now restore it
-            restore_response = test_client.post(
-                "/restore",
-                json={"redacted_text": redacted_text}
-            )
-
-            assert restore_response.status_code == 200
-            data = restore_response.json()
-
-            # Verify restoration
-            assert "original_text" in data
-            assert "john@example.com" in data["original_text"]
+        # First redact some text with restoration enabled
+        redact_response = test_client.post(
+            "/redact",
+            json={
+                "text": "Contact john@example.com",
+                "policy": {"restoration_allowed": True}
+            }
+        )
+
+        assert redact_response.status_code == 200
+        redacted_text = redact_response.json()["redacted_text"]
+
+        # Now restore it
+        restore_response = test_client.post(
+            "/restore",
+            json={"redacted_text": redacted_text}
+        )
+
+        assert restore_response.status_code == 200
+        data = restore_response.json()
+
+        # Verify restoration
+        assert "original_text" in data
+        assert "john@example.com" in data["original_text"]
 
     def test_restore_endpoint_missing_keys(self, test_client):
         """Test restore with non-existent Redis keys."""
@@ -211,6 +165,23 @@ class TestRestoreEndpoint:
         assert data["original_text"] == ""
 
 
+class TestPurgeTokenKeys:
+    """Test suite for the audit purge helper."""
+
+    def test_purge_spans_multiple_chunks(self, mock_redis):
+        """Test purging more tokens than one UNLINK chunk holds."""
+        from app.main import purge_token_keys, PURGE_CHUNK_SIZE
+
+        keys = [f"[REDACTED_{i:016x}]" for i in range(PURGE_CHUNK_SIZE * 2 + 5)]
+        live = keys[::2]
+        for key in live:
+            mock_redis.set(key, "pii")
+            mock_redis.set(f"{key}:policy", "general:True")
+
+        assert purge_token_keys(mock_redis, keys) == len(live)
+        assert mock_redis.dbsize() == 0
+
+
 class TestMetricsEndpoint:
     """Test suite for /metrics endpoint."""
 
@@ -229,122 +200,108 @@ class TestMetricsEndpoint:
 
     def test_metrics_endpoint_after_redaction(self, test_client):
         """Test that metrics are updated after redaction."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            # Perform a redaction
-            test_client.post(
-                "/redact",
-                json={"text": "Email: test@example.com"}
-            )
+        # Perform a redaction
+        test_client.post(
+            "/redact",
+            content=_CLEAN_TEXT_BODY,
+            headers=_JSON_HEADERS
+        )
 
-            # Check metrics
-            metrics_response = test_client.get("/metrics")
-            assert metrics_response.status_code == 200
+        # Check metrics
+        metrics_response = test_client.get("/metrics")
+        assert metrics_response.status_code == 200
 
-            # Metrics should include redaction count
-            content = metrics_response.text
-            assert "total_redactions" in content
+        # Metrics should include redaction count
+        content = metrics_response.text
+        assert "total_redactions" in content
 
 
+@pytest.mark.integration
+@pytest.mark.usefixtures("fake_analyzer")
 class TestEndToEndFlow:
     """Test complete end-to-end workflows."""
 
-    def test_full_redact_restore_flow(self, test_client):
+    def test_full_redact_restore_flow(self, test_client, mock_redis):
         """Test complete flow: redact → verify in Redis → restore."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            original_text = "My email is alice@example.com and phone is 555-9876"
-
-            # Step 1: Redact with restoration enabled
-            redact_response = test_client.post(
-                "/redact",
-                json={
-                    "text": original_text,
-                    "policy": {"restoration_allowed": True}
-                }
-            )
-
-            assert redact_response.status_code == 200
-            redacted_text = redact_response.json()["redacted_text"]
-
-            # Verify PII is redacted
-            assert "alice@example.com" not in redacted_text
-            # Note: "555-9876" format may not be detected by Presidio (no area code)
-            # This is a known limitation that will be captured in evaluation
-            # assert "555-9876" not in redacted_text  # May fail - known Presidio limitation
-
-            # Step 2: Restore
-            restore_response = test_client.post(
-                "/restore",
-                json={"redacted_text": redacted_text}
-            )
-
-            assert restore_response.status_code == 200
-            restored_text = restore_response.json()["original_text"]
-
-            # Verify restoration
-            assert "alice@example.com" in restored_text or "555-9876" in restored_text
-
-    def test_multiple_concurrent_redactions(self, test_client):
+        original_text = "My email is alice@example.com and phone is 555-9876"
+
+        # Step 1: Redact with restoration enabled
+        redact_response = test_client.post(
+            "/redact",
+            json={
+                "text": original_text,
+                "policy": {"restoration_allowed": True}
+            }
+        )
+
+        assert redact_response.status_code == 200
+        redacted_text = redact_response.json()["redacted_text"]
+
+        # Verify PII is redacted
+        assert "alice@example.com" not in redacted_text
+        # Note: "555-9876" format may not be detected by Presidio (no area code)
+        # This is a known limitation that will be captured in evaluation
+        # assert "555-9876" not in redacted_text  # May fail - known Presidio limitation
+
+        # Step 2: Verify every token is stored in Redis (one MGET round-trip)
+        tokens = TOKEN_RE.findall(redacted_text)
+        assert tokens
+        stored_values = mock_redis.mget(tokens)
+        assert all(stored_values)
+        assert "alice@example.com" in stored_values
+
+        # Step 3: Restore
+        restore_response = test_client.post(
+            "/restore",
+            json={"redacted_text": redacted_text}
+        )
+
+        assert restore_response.status_code == 200
+        restored_text = restore_response.json()["original_text"]
+
+        # Verify restoration
+        assert "alice@example.com" in restored_text or "555-9876" in restored_text
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_multiple_concurrent_redactions(self, async_client):
         """Test multiple concurrent redaction requests."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            texts = [
-                "Contact alice@example.com",
-                "Call Bob at 555-1111",
-                "Jane Doe lives in NYC"
-            ]
-
-            responses = []
-            for text in texts:
-                response = test_client.post("/redact", json={"text": text})
-                assert response.status_code == 200
-                responses.append(response.json())
-
-            # All should have unique redacted texts
-            redacted_texts = [r["redacted_text"] for r in responses]
-            assert len(set(redacted_texts)) == len(redacted_texts)
+        texts = [
+            "Contact alice@example.com",
+            "Call Bob at 555-1111",
+            "Jane Doe lives in NYC"
+        ]
+
+        results = await asyncio.gather(
+            *[async_client.post("/redact", json={"text": text}) for text in texts]
+        )
 
+        responses = []
+        for response in results:
+            assert response.status_code == 200
+            responses.append(response.json())
+
+        # All should have unique redacted texts
+        redacted_texts = [r["redacted_text"] for r in responses]
+        assert len(set(redacted_texts)) == len(redacted_texts)
+
+        # Interleaved requests must not hand out the same token twice
+        tokens = [t for text in redacted_texts for t in TOKEN_RE.findall(text)]
+        assert len(set(tokens)) == len(tokens)
+
+    @pytest.mark.ollama_leak
     def test_audit_leak_detection_flow(self, test_client, mock_redis):
         """Test flow when LLM auditor detects a leak."""
-        with respx.mock:
-            # Mock LLM to report a leak
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": true, "reason": "Email leaked"}'}
-                )
-            )
-
-            # Redact text
-            redact_response = test_client.post(
-                "/redact",
-                json={"text": "Contact test@example.com"}
-            )
-
-            assert redact_response.status_code == 200
-            redacted_text = redact_response.json()["redacted_text"]
-
-            # Give background task time to execute
-            # Note: In real test, would need to wait or use async test utilities
-            # For now, just verify the response was successful
-
-            assert redacted_text is not None
+        # Redact text (the LLM mock reports a leak via the ollama_leak marker)
+        redact_response = test_client.post(
+            "/redact",
+            json={"text": "Contact test@example.com"}
+        )
+
+        assert redact_response.status_code == 200
+        redacted_text = redact_response.json()["redacted_text"]
+
+        # TestClient runs background tasks before returning, so the purge already happened
+        tokens = TOKEN_RE.findall(redacted_text)
+        assert tokens
+        for token in tokens:
+            assert mock_redis.exists(token, f"{token}:policy") == 0
@@ -4,8 +4,6 @@ Integration tests for authenticated restoration endpoint.
 import pytest
 from unittest.mock import AsyncMock, patch
 import uuid
-import respx
-from httpx import Response
 
 
 class TestAuthenticatedRestore:
@@ -44,51 +42,35 @@ class TestAuthenticatedRestore:
 
     def test_restore_policy_blocks_restoration(self, test_client, mock_redis):
         """Test that policy violations are properly handled."""
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-            )
-
-            # First redact with healthcare policy (blocks restoration)
-            redact_response = test_client.post(
-                "/redact",
-                json={
-                    "text": "Patient email is jane@example.com",
-                    "policy": {"context": "healthcare"}
-                }
-            )
-
-            assert redact_response.status_code == 200
-            redacted_text = redact_response.json()["redacted_text"]
-
-            # Now try to restore - should fail due to policy
-            response = test_client.post(
-                "/restore",
-                json={"redacted_text": redacted_text}
-            )
+        # First redact with healthcare policy (blocks restoration)
+        redact_response = test_client.post(
+            "/redact",
+            json={
+                "text": "Patient email is jane@example.com",
+                "policy": {"context": "healthcare"}
+            }
+        )
+
+        assert redact_response.status_code == 200
+        redacted_text = redact_response.json()["redacted_text"]
+
+        # Now try to restore - should fail due to policy
+        response = test_client.post(
+            "/restore",
+            json={"redacted_text": redacted_text}
+        )
 
         # Should fail with 403 (policy violation)
         assert response.status_code == 403
         assert "forbidden" in response.json()["detail"].lower()
 
 
+@pytest.mark.integration
 class TestAPIKeyManagement:
     """Test API key management endpoints."""
 
-    @pytest.mark.asyncio
-    async def test_create_api_key(self, test_client, test_db_session):
+    def test_create_api_key(self, test_client, override_db):
         """Test creating a new API key."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         response = test_client.post(
             "/admin/api-keys",
             json={
@@ -105,17 +87,8 @@ class TestAPIKeyManagement:
         assert data["service_name"] == "test_service"
         assert "IMPORTANT" in data["warning"]
 
-    @pytest.mark.asyncio
-    async def test_list_api_keys(self, test_client, test_db_session, test_api_key):
+    def test_list_api_keys(self, test_client, override_db, test_api_key):
         """Test listing API keys."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         response = test_client.get("/admin/api-keys")
 
         assert response.status_code == 200
@@ -125,17 +98,8 @@ class TestAPIKeyManagement:
         assert "total" in data
         assert data["total"] >= 1
 
-    @pytest.mark.asyncio
-    async def test_revoke_api_key(self, test_client, test_db_session, test_api_key):
+    def test_revoke_api_key(self, test_client, override_db, test_api_key):
         """Test revoking an API key."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         key_id = test_api_key["record"].id
 
         response = test_client.delete(f"/admin/api-keys/{key_id}")
@@ -147,17 +111,8 @@ class TestAPIKeyManagement:
 class TestAuditLogEndpoint:
     """Test audit log query endpoint."""
 
-    @pytest.mark.asyncio
-    async def test_get_audit_logs(self, test_client, test_db_session):
+    def test_get_audit_logs(self, test_client, override_db):
         """Test querying audit logs."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         response = test_client.get("/admin/audit-logs")
 
         assert response.status_code == 200
@@ -168,17 +123,8 @@ class TestAuditLogEndpoint:
         assert "limit" in data
         assert "offset" in data
 
-    @pytest.mark.asyncio
-    async def test_get_audit_logs_with_filter(self, test_client, test_db_session):
+    def test_get_audit_logs_with_filter(self, test_client, override_db):
         """Test filtering audit logs by service name."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         response = test_client.get(
             "/admin/audit-logs?service_name=test_service"
         )
@@ -190,17 +136,8 @@ class TestAuditLogEndpoint:
         for log in data["logs"]:
             assert log["service_name"] == "test_service"
 
-    @pytest.mark.asyncio
-    async def test_get_audit_logs_pagination(self, test_client, test_db_session):
+    def test_get_audit_logs_pagination(self, test_client, override_db):
         """Test audit log pagination."""
-        from app.main import app
-        from app.database import get_session
-
-        async def override_get_session():
-            yield test_db_session
-
-        app.dependency_overrides[get_session] = override_get_session
-
         response = test_client.get(
             "/admin/audit-logs?limit=10&offset=5"
         )
@@ -0,0 +1,47 @@
+"""
+Unit tests for the JSON helpers used on Ollama bodies.
+
+Each test runs against the stdlib fallback and, when it is installed, orjson.
+"""
+import pytest
+from app import jsonutil
+
+_BACKENDS = ["stdlib"] + (["orjson"] if jsonutil.orjson is not None else [])
+
+
+@pytest.fixture(params=_BACKENDS)
+def backend(request, monkeypatch):
+    """Run the test with the given JSON backend active."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(jsonutil, "orjson", None)
+    return request.param
+
+
+class TestJsonBackends:
+    """Both backends must produce and accept the same wire format."""
+
+    def test_dumps_is_compact_utf8_bytes(self, backend):
+        """Test that dumps returns compact UTF-8 bytes without ASCII escaping."""
+        assert jsonutil.dumps({"prompt": "café", "stream": True}) == '{"prompt":"café","stream":true}'.encode()
+
+    @pytest.mark.parametrize("data", ['{"leaked": false}', b'{"leaked": false}'])
+    def test_loads_accepts_str_and_bytes(self, backend, data):
+        """Test that loads decodes both str and bytes input."""
+        assert jsonutil.loads(data) == {"leaked": False}
+
+    def test_loads_raises_value_error_on_malformed_input(self, backend):
+        """Test that malformed JSON raises ValueError, which callers catch."""
+        with pytest.raises(ValueError):
+            jsonutil.loads('{"leaked": tr')
+
+
+class TestStripJsonFence:
+    """Tests for markdown fence removal."""
+
+    @pytest.mark.parametrize(
+        "text",
+        ['{"a": 1}', '```json\n{"a": 1}\n```', '```\n{"a": 1}\n```', '  ```json{"a": 1}```  '],
+    )
+    def test_strips_optional_fence(self, text):
+        """Test that fenced and bare replies strip to the same JSON."""
+        assert jsonutil.strip_json_fence(text) == '{"a": 1}'
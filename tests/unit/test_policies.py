@@ -4,6 +4,8 @@ Unit tests for Policy Engine.
 Tests policy loading, merging, entity filtering, and confidence thresholds.
 """
 
+import dataclasses
+
 import pytest
 from presidio_analyzer import RecognizerResult, EntityRecognizer
 from app.policies import (
@@ -34,6 +36,17 @@ class TestRedactionPolicy:
         assert policy.restoration_allowed is True
         assert policy.min_confidence_threshold == 0.7
 
+    def test_entity_lists_are_immutable(self):
+        """Test that entity lists are stored as tuples, so the lookup sets can't go stale."""
+        source = ["EMAIL_ADDRESS"]
+        policy = RedactionPolicy(context="test", enabled_entities=source)
+        source.append("PERSON")
+
+        assert policy.enabled_entities == ("EMAIL_ADDRESS",)
+        assert policy.enabled_set == frozenset({"EMAIL_ADDRESS"})
+        with pytest.raises(AttributeError):
+            GENERAL_POLICY.enabled_entities.append("CUSTOM")
+
     def test_is_entity_allowed_enabled(self):
         """Test entity is allowed when in enabled_entities."""
         policy = RedactionPolicy(
@@ -94,6 +107,11 @@ class TestRedactionPolicy:
         assert policy.meets_confidence_threshold(0.6) is False
         assert policy.meets_confidence_threshold(0.0) is False
 
+    def test_policy_is_immutable(self):
+        """Test that shared policies cannot be mutated after construction."""
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            GENERAL_POLICY.restoration_allowed = True
+
 
 class TestPolicyEngine:
     """Tests for PolicyEngine class."""
@@ -106,6 +124,7 @@ class TestPolicyEngine:
         assert policy.context == "general"
         assert policy.restoration_allowed is False  # Default is opt-in (False)
         assert len(policy.enabled_entities) > 0
+        assert policy is GENERAL_POLICY  # Shared instance, not a copy
 
     def test_load_policy_healthcare(self):
         """Test loading healthcare policy."""
@@ -165,7 +184,7 @@ class TestPolicyEngine:
 
         merged = engine.merge_policies(global_policy, request_policy)
 
-        assert merged.enabled_entities == ["EMAIL_ADDRESS", "PERSON"]
+        assert merged.enabled_entities == ("EMAIL_ADDRESS", "PERSON")
         assert merged.context == global_policy.context  # Inherited
 
     def test_merge_policies_restoration_override(self):
@@ -196,8 +215,8 @@ class TestPolicyEngine:
         merged = engine.merge_policies(global_policy, request_policy)
 
         assert merged.context == "custom"
-        assert merged.enabled_entities == ["EMAIL_ADDRESS"]
-        assert merged.disabled_entities == ["PHONE_NUMBER"]
+        assert merged.enabled_entities == ("EMAIL_ADDRESS",)
+        assert merged.disabled_entities == ("PHONE_NUMBER",)
         assert merged.restoration_allowed is False
         assert merged.min_confidence_threshold == 0.9
 
@@ -290,6 +309,29 @@ class TestPolicyEngine:
         assert filtered[1].entity_type == "PHONE_NUMBER"
         assert filtered[1].score == 0.8
 
+    def test_filter_entities_large_batch_matches_scalar_rules(self):
+        """Test that long result lists are filtered by the same per-entity rules."""
+        engine = PolicyEngine()
+        policy = RedactionPolicy(
+            context="test",
+            enabled_entities=["EMAIL_ADDRESS", "PERSON", "PHONE_NUMBER"],
+            disabled_entities=["PERSON"],
+            min_confidence_threshold=0.7
+        )
+
+        entity_types = ["EMAIL_ADDRESS", "PERSON", "PHONE_NUMBER", "US_SSN"]
+        scores = [0.9, 0.7, 0.6]
+        results = [
+            RecognizerResult(entity_type=entity_types[i % 4], start=i, end=i + 1, score=scores[i % 3])
+            for i in range(120)
+        ]
+
+        filtered = engine.filter_entities(results, policy)
+
+        expected = [r for r in results if policy.is_entity_allowed(r.entity_type) and r.score >= 0.7]
+        assert filtered == expected
+        assert len(filtered) > 0
+
     def test_register_custom_policy(self):
         """Test registering a custom policy."""
         engine = PolicyEngine()
@@ -303,7 +345,7 @@ class TestPolicyEngine:
 
         loaded = engine.load_policy("custom")
         assert loaded.context == "custom"
-        assert loaded.enabled_entities == ["EMAIL_ADDRESS"]
+        assert loaded.enabled_entities == ("EMAIL_ADDRESS",)
 
     def test_get_available_contexts(self):
         """Test getting list of available policy contexts."""
@@ -316,6 +358,15 @@ class TestPolicyEngine:
         assert "finance" in contexts
         assert len(contexts) >= 3
 
+    def test_get_available_contexts_after_register(self):
+        """Test that registering a policy refreshes the cached context list."""
+        engine = PolicyEngine()
+        engine.get_available_contexts()
+
+        engine.register_policy(RedactionPolicy(context="custom"))
+
+        assert "custom" in engine.get_available_contexts()
+
 
 class TestPredefinedPolicies:
     """Tests for predefined policy configurations."""
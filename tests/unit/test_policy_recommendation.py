@@ -12,16 +12,8 @@ class TestPolicyRecommendationService:
     """Test suite for PolicyRecommendationService."""
 
     @pytest.fixture
-    def recommendation_service(self, monkeypatch):
-        """Create a PolicyRecommendationService instance with test settings."""
-        # Set test environment variables
-        monkeypatch.setenv("OLLAMA_URL", "http://ollama:11434/api/generate")
-        monkeypatch.setenv("OLLAMA_MODEL", "phi3")
-
-        # Reload settings
-        from app.config import reload_settings
-        reload_settings()
-
+    def recommendation_service(self, ollama_test_settings):
+        """Create a fresh PolicyRecommendationService (own client and cache) with test settings."""
         return PolicyRecommendationService()
 
     @pytest.mark.asyncio
@@ -166,6 +158,78 @@ class TestPolicyRecommendationService:
             assert result["recommended_context"] == "healthcare"
             assert result["confidence"] == 0.9
 
+    @pytest.mark.asyncio
+    async def test_suggest_policy_unterminated_fence_falls_back(self, recommendation_service):
+        """Test that an opened but never closed fence is rejected quickly and falls back."""
+        text = "Patient data"
+
+        with respx.mock:
+            respx.post("http://ollama:11434/api/generate").mock(
+                return_value=Response(200, json={"response": "```json\n" + "` " * 50_000})
+            )
+
+            result = await recommendation_service.suggest_policy(text)
+
+            assert result["recommended_context"] == "general"
+
+    @pytest.mark.asyncio
+    async def test_suggest_policy_streamed_chunks(self, recommendation_service):
+        """Test that NDJSON stream chunks are joined before parsing."""
+        text = "Credit card payment"
+        payload = json.dumps({
+            "recommended_context": "finance",
+            "confidence": 0.9,
+            "reasoning": "Payment card data",
+            "detected_domains": ["finance"],
+            "alternative_contexts": [],
+            "risk_warning": None
+        })
+        middle = len(payload) // 2
+        ndjson = "\n".join([
+            json.dumps({"response": payload[:middle], "done": False}),
+            json.dumps({"response": payload[middle:], "done": False}),
+            json.dumps({"response": "", "done": True})
+        ])
+
+        with respx.mock:
+            route = respx.post("http://ollama:11434/api/generate").mock(
+                return_value=Response(200, content=ndjson.encode())
+            )
+
+            result = await recommendation_service.suggest_policy(text)
+
+            assert json.loads(route.calls.last.request.content)["stream"] is True
+            assert result["recommended_context"] == "finance"
+            assert result["confidence"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_suggest_policy_caches_llm_result(self, recommendation_service):
+        """Test that repeated text is answered from cache, but fallbacks are not cached."""
+        text = "Patient record"
+
+        with respx.mock:
+            route = respx.post("http://ollama:11434/api/generate").mock(
+                side_effect=[
+                    Response(500),
+                    Response(
+                        200,
+                        json={
+                            "response": '{"recommended_context": "healthcare", "confidence": 0.9, "reasoning": "PHI", "detected_domains": ["healthcare"], "alternative_contexts": [], "risk_warning": null}'
+                        }
+                    )
+                ]
+            )
+
+            fallback = await recommendation_service.suggest_policy(text)
+            first = await recommendation_service.suggest_policy(text)
+            first["detected_domains"].append("mutated")
+            second = await recommendation_service.suggest_policy(text)
+
+            assert route.call_count == 2
+            assert fallback["recommended_context"] == "general"
+            assert second["recommended_context"] == "healthcare"
+            assert second["detected_domains"] == ["healthcare"]
+
     @pytest.mark.asyncio
     async def test_suggest_policy_timeout_fallback(self, recommendation_service):
         """Test fallback to keyword-based recommendation on timeout."""
@@ -281,6 +345,15 @@ class TestPolicyRecommendationService:
             assert result["recommended_context"] == "general"
             assert "general" in result["detected_domains"]
 
+    def test_keyword_fallback_counts_each_keyword_once(self, recommendation_service):
+        """Test that keywords match as substrings and repeats do not raise the score."""
+        repeated = recommendation_service._get_default_recommendation("patient patient patient")
+        assert repeated["recommended_context"] == "general"
+
+        result = recommendation_service._get_default_recommendation("Patients admitted to the hospital")
+        assert result["recommended_context"] == "healthcare"
+        assert result["confidence"] == pytest.approx(0.7)
+
     @pytest.mark.asyncio
     async def test_confidence_in_valid_range(self, recommendation_service):
         """Test that confidence is always between 0.0 and 1.0."""
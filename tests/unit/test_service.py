@@ -3,55 +3,44 @@ Unit tests for RedactorService class.
 """
 import pytest
 import re
-from app.service import RedactorService
+from app.service import RedactorService, TOKEN_RE
 
 
 class TestRedactorService:
     """Test suite for RedactorService."""
 
-    def test_redact_and_store_email(self, mock_redactor_service, sample_pii_texts):
-        """Test redaction of email addresses."""
-        text = sample_pii_texts["email"]
+    @pytest.mark.parametrize(
+        "key,missing,min_tokens",
+        [
+            ("email", ["john.doe@example.com"], 1),
+            ("phone", ["555-123-4567", "555) 987-6543"], 1),
+            ("name", ["Jane Smith"], 1),
+            ("multiple", ["Jane Doe", "jane@example.com"], 2),
+        ],
+    )
+    def test_redact_and_store_entities(
+        self, mock_redactor_service, sample_pii_texts, key, missing, min_tokens
+    ):
+        """Test redaction of email, phone, name and mixed PII samples."""
+        text = sample_pii_texts[key]
         redacted_text, scores, keys = mock_redactor_service.redact_and_store(text)
 
-        # Verify email is redacted
-        assert "john.doe@example.com" not in redacted_text
-        assert "[REDACTED_" in redacted_text
+        # Verify every PII value is gone
+        for value in missing:
+            assert value not in redacted_text
 
-        # Verify token format
-        tokens = re.findall(r"\[REDACTED_[a-z0-9]+\]", redacted_text)
-        assert len(tokens) > 0
+        # Verify token format and count
+        tokens = TOKEN_RE.findall(redacted_text)
+        assert len(tokens) >= min_tokens
 
         # Verify keys were returned
-        assert len(keys) > 0
-        assert all(key.startswith("[REDACTED_") for key in keys)
+        assert len(keys) >= min_tokens
+        assert all(k.startswith("[REDACTED_") for k in keys)
 
         # Verify confidence scores
-        assert len(scores) > 0
+        assert len(scores) >= min_tokens
         assert all(0 <= score <= 1 for score in scores)
 
-    def test_redact_and_store_phone_number(self, mock_redactor_service, sample_pii_texts):
-        """Test redaction of phone numbers."""
-        text = sample_pii_texts["phone"]
-        redacted_text, scores, keys = mock_redactor_service.redact_and_store(text)
-
-        # Verify phone numbers are redacted
-        assert "555-123-4567" not in redacted_text
-        assert "555) 987-6543" not in redacted_text
-        assert "[REDACTED_" in redacted_text
-
-        # Verify tokens created
-        assert len(keys) > 0
-
-    def test_redact_and_store_name(self, mock_redactor_service, sample_pii_texts):
-        """Test redaction of person names."""
-        text = sample_pii_texts["name"]
-        redacted_text, scores, keys = mock_redactor_service.redact_and_store(text)
-
-        # Verify name is redacted
-        assert "Jane Smith" not in redacted_text
-        assert "[REDACTED_" in redacted_text
-
     def test_redact_and_store_ssn(self, mock_redactor_service, sample_pii_texts):
         """Test redaction of Social Security Numbers."""
         text = sample_pii_texts["ssn"]
@@ -70,22 +59,6 @@ class TestRedactorService:
         else:
             assert has_tokens
 
-    def test_redact_and_store_multiple_entities(self, mock_redactor_service, sample_pii_texts):
-        """Test redaction of multiple PII entities in same text."""
-        text = sample_pii_texts["multiple"]
-        redacted_text, scores, keys = mock_redactor_service.redact_and_store(text)
-
-        # Verify multiple entities redacted
-        assert "Jane Doe" not in redacted_text
-        assert "jane@example.com" not in redacted_text
-
-        # Verify multiple tokens created
-        tokens = re.findall(r"\[REDACTED_[a-z0-9]+\]", redacted_text)
-        assert len(tokens) >= 2
-
-        # Verify multiple scores
-        assert len(scores) >= 2
-
     def test_redact_and_store_no_pii(self, mock_redactor_service, sample_pii_texts):
         """Test handling of text with no PII."""
         text = sample_pii_texts["no_pii"]
@@ -107,6 +80,23 @@ class TestRedactorService:
         assert len(keys) == 0
         assert len(scores) == 0
 
+    def test_redact_and_store_with_batch_analyzer_results(self, mock_redactor_service, sample_pii_texts):
+        """Test redaction using results precomputed by analyze_batch."""
+        texts = [sample_pii_texts["email"], sample_pii_texts["no_pii"]]
+        batch_results = mock_redactor_service.analyze_batch(texts)
+
+        # One result list per input text, in order
+        assert len(batch_results) == 2
+        assert len(batch_results[0]) > 0
+        assert batch_results[1] == []
+
+        redacted_text, scores, keys = mock_redactor_service.redact_and_store(
+            texts[0], analyzer_results=batch_results[0]
+        )
+        assert "john.doe@example.com" not in redacted_text
+        assert len(keys) > 0
+        assert len(scores) == len(batch_results[0])
+
     def test_restore_with_valid_tokens(self, mock_redactor_service):
         """Test restoring text with valid tokens in Redis."""
         # First redact some text
@@ -148,8 +138,7 @@ class TestRedactorService:
         redacted_text, _, keys = mock_redactor_service.redact_and_store(original_text)
 
         # Count actual tokens in redacted text (Presidio may create overlapping entities)
-        import re
-        actual_tokens = re.findall(r"\[REDACTED_[a-z0-9]+\]", redacted_text)
+        actual_tokens = TOKEN_RE.findall(redacted_text)
 
         # Delete keys to simulate expiry
         for key in keys:
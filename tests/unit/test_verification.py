@@ -3,411 +3,384 @@ Unit tests for VerificationAgent class.
 """
 import pytest
 import respx
+import httpx
 from httpx import Response
-import json
+from app import jsonutil
 from app.verification import VerificationAgent
 
+_JSON_HEADERS = {"content-type": "application/json"}
+# Encoded once at import; Response objects are safe to hand out repeatedly
+_SERVER_ERROR_RESP = Response(500, content=b'{"error": "Internal server error"}', headers=_JSON_HEADERS)
+# ~16 KB of tokens for the long-input test, built once at import
+_LONG_REDACTED_TEXT = "Text " + "[REDACTED_xxxx] " * 1000
 
-class TestVerificationAgent:
-    """Test suite for VerificationAgent."""
 
-    @pytest.fixture
-    def verification_agent(self, monkeypatch):
-        """Create a VerificationAgent instance with test settings."""
-        # Set test environment variables
-        monkeypatch.setenv("OLLAMA_URL", "http://ollama:11434/api/generate")
-        monkeypatch.setenv("OLLAMA_MODEL", "phi3")
+def _ollama_reply(payload) -> Response:
+    """Builds a non-streamed Ollama reply whose 'response' field carries payload."""
+    body = payload if isinstance(payload, str) else jsonutil.dumps(payload).decode()
+    return Response(200, content=jsonutil.dumps({"response": body}), headers=_JSON_HEADERS)
+
+
+class TestVerificationAgent:
+    """Test suite for VerificationAgent.
 
-        # Reload settings to pick up env vars
-        from app.config import reload_settings
-        reload_settings()
+    Ollama is answered by the session-wide respx route from conftest; tests
+    set their reply through ``ollama_replies`` (key ``""`` matches any prompt)
+    and inspect calls through ``ollama_route``.
+    """
 
+    @pytest.fixture
+    def verification_agent(self, ollama_test_settings):
+        """Create a fresh VerificationAgent (own client and cache) with test settings."""
         return VerificationAgent()
 
+    @pytest.fixture
+    def ollama_route(self, mock_ollama_default):
+        """The shared Ollama route, with call history reset for this test."""
+        return mock_ollama_default
+
     @pytest.mark.asyncio
-    async def test_check_for_leaks_clean_text(self, verification_agent):
+    async def test_check_for_leaks_clean_text(self, verification_agent, ollama_replies):
         """Test LLM check on properly redacted text."""
         redacted_text = "Contact [REDACTED_a1b2] at [REDACTED_c3d4]"
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "All PII properly redacted"}')
 
-        with respx.mock:
-            # Mock Ollama API response
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": '{"leaked": false, "reason": "All PII properly redacted"}'
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
-
-            # Parse result
-            if isinstance(result_raw, str):
-                result = json.loads(result_raw)
-            else:
-                result = json.loads(result_raw)
-
-            assert result["leaked"] is False
-            assert "reason" in result
+        result = jsonutil.loads(await verification_agent.check_for_leaks(redacted_text))
+
+        assert result["leaked"] is False
+        assert "reason" in result
 
     @pytest.mark.asyncio
-    async def test_check_for_leaks_with_leak(self, verification_agent):
+    async def test_check_for_leaks_with_leak(self, verification_agent, ollama_route, ollama_replies):
         """Test LLM check on text with leaked PII."""
         leaked_text = "Contact john.doe@example.com for details"
+        ollama_replies[""] = _ollama_reply(
+            '{"leaked": true, "reason": "Email address john.doe@example.com not redacted"}'
+        )
 
-        with respx.mock:
-            # Mock Ollama API response indicating leak
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": '{"leaked": true, "reason": "Email address john.doe@example.com not redacted"}'
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(leaked_text)
-
-            # Parse result
-            if isinstance(result_raw, str):
-                result = json.loads(result_raw)
-            else:
-                result = json.loads(result_raw)
-
-            assert result["leaked"] is True
-            assert "john.doe@example.com" in result["reason"] or "email" in result["reason"].lower()
+        result = jsonutil.loads(await verification_agent.check_for_leaks(leaked_text))
+
+        assert ollama_route.called
+        assert result["leaked"] is True
+        assert "john.doe@example.com" in result["reason"] or "email" in result["reason"].lower()
+
+    @pytest.mark.asyncio
+    async def test_rule_based_precheck_skips_llm_for_token_only_text(self, verification_agent, ollama_route):
+        """Test that text holding only redaction tokens is cleared without calling Ollama."""
+        result = jsonutil.loads(await verification_agent.check_for_leaks("[REDACTED_a1b2], [REDACTED_c3d4]."))
+
+        assert result["leaked"] is False
+        assert result["reason"].startswith("Rule-based precheck")
+        assert not ollama_route.called
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "text",
+        ["Reach me at jane@example.com", "SSN 123-45-6789 on file", "Call (555) 987-6543"],
+    )
+    async def test_visible_pii_goes_to_llm(self, verification_agent, ollama_route, ollama_replies, text):
+        """Test that visible PII is judged by the LLM, since the policy may leave it visible."""
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "Allowed by policy"}')
+
+        result = jsonutil.loads(await verification_agent.check_for_leaks(text))
+
+        assert ollama_route.call_count == 1
+        assert result["leaked"] is False
 
     @pytest.mark.asyncio
-    async def test_check_for_leaks_with_markdown_wrapped_json(self, verification_agent):
+    async def test_check_for_leaks_stops_at_streamed_leak_verdict(
+        self, verification_agent, ollama_route, ollama_replies
+    ):
+        """Test that a streamed leak verdict is returned early, without caching its placeholder reason."""
+        ndjson = b"\n".join([
+            jsonutil.dumps({"response": '{"leaked": tr', "done": False}),
+            jsonutil.dumps({"response": 'ue, "reason": "Em', "done": False}),
+            b"not json - must never be read",
+        ])
+        ollama_replies[""] = Response(200, content=ndjson)
+
+        result = jsonutil.loads(await verification_agent.check_for_leaks("Ask Jane Smith"))
+        ollama_replies[""] = _ollama_reply('{"leaked": true, "reason": "Name Jane Smith visible"}')
+        repeated = jsonutil.loads(await verification_agent.check_for_leaks("Ask Jane Smith"))
+
+        assert result["leaked"] is True
+        assert "reason" in result
+        assert repeated["reason"] == "Name Jane Smith visible"
+        assert ollama_route.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_streamed_verdict_split_after_long_prefix(self, verification_agent, ollama_replies):
+        """Test that a verdict key split across chunks is found after a long streamed prefix."""
+        reply = jsonutil.dumps({"reason": "Name visible " * 200, "leaked": True}).decode()
+        split = reply.index('"leaked"') + 4
+        ndjson = b"\n".join(
+            [jsonutil.dumps({"response": reply[i:min(i + 7, split)], "done": False}) for i in range(0, split, 7)]
+            + [jsonutil.dumps({"response": reply[split:], "done": False}), b"not json - must never be read"]
+        )
+        ollama_replies[""] = Response(200, content=ndjson)
+
+        result = jsonutil.loads(await verification_agent.check_for_leaks("Ask Jane Smith"))
+
+        assert result["leaked"] is True
+        assert result["reason"].startswith("Name visible")
+
+    @pytest.mark.asyncio
+    async def test_fenced_leak_verdict_keeps_reason(self, verification_agent, ollama_replies):
+        """Test that an early leak exit on a fenced reply keeps the LLM's reason."""
+        ollama_replies[""] = _ollama_reply('```json\n{"leaked": true, "reason": "Name Jane Smith visible"}\n```')
+
+        raw = await verification_agent.check_for_leaks("Ask Jane Smith")
+        result = jsonutil.loads(jsonutil.strip_json_fence(raw))
+
+        assert result["leaked"] is True
+        assert result["reason"] == "Name Jane Smith visible"
+
+    @pytest.mark.asyncio
+    async def test_check_for_leaks_with_markdown_wrapped_json(self, verification_agent, ollama_replies):
         """Test parsing JSON wrapped in markdown code blocks."""
         redacted_text = "Contact [REDACTED_xyz1]"
+        ollama_replies[""] = _ollama_reply('```json\n{"leaked": false, "reason": "Clean"}\n```')
 
-        with respx.mock:
-            # Mock response with markdown-wrapped JSON
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": '```json\n{"leaked": false, "reason": "Clean"}\n```'
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
-
-            # The app/main.py audit_redaction_task handles cleaning
-            # Here we just verify the response is returned
-            assert result_raw is not None
-            assert "leaked" in result_raw
+        result_raw = await verification_agent.check_for_leaks(redacted_text)
+
+        # The app/main.py audit_redaction_task handles cleaning
+        # Here we just verify the response is returned
+        assert result_raw is not None
+        assert "leaked" in result_raw
 
     @pytest.mark.asyncio
-    async def test_check_for_leaks_timeout(self, verification_agent):
-        """Test handling of LLM timeout."""
+    @pytest.mark.parametrize(
+        "error,expected",
+        [
+            (httpx.ReadTimeout("timeout"), "Timeout waiting for LLM response"),
+            (httpx.ConnectError("Connection refused"), "Connection refused"),
+        ],
+    )
+    async def test_check_for_leaks_transport_errors(self, verification_agent, error, expected):
+        """Test that timeouts and connection failures come back as error verdicts."""
         redacted_text = "Contact [REDACTED_a1b2]"
 
+        # Raising replies need their own router; the shared one only returns responses
         with respx.mock:
-            # Mock timeout
-            respx.post("http://ollama:11434/api/generate").mock(
-                side_effect=Exception("Connection timeout")
-            )
+            respx.post("http://ollama:11434/api/generate").mock(side_effect=error)
+
+            result = jsonutil.loads(await verification_agent.check_for_leaks(redacted_text))
 
-            result = await verification_agent.check_for_leaks(redacted_text)
+            assert result == {"leaked": False, "error": expected}
+
+    @pytest.mark.asyncio
+    async def test_check_for_leaks_propagates_unexpected_errors(self, verification_agent):
+        """Test that non-transport exceptions are not disguised as audit errors."""
+        with respx.mock:
+            respx.post("http://ollama:11434/api/generate").mock(side_effect=RuntimeError("bug"))
 
-            # Should return error response
-            assert "error" in result or result.get("leaked") is False
+            with pytest.raises(RuntimeError, match="bug"):
+                await verification_agent.check_for_leaks("Contact [REDACTED_a1b2]")
 
     @pytest.mark.asyncio
-    async def test_check_for_leaks_malformed_json(self, verification_agent):
+    async def test_check_for_leaks_malformed_json(self, verification_agent, ollama_replies):
         """Test handling of malformed JSON response."""
         redacted_text = "Contact [REDACTED_a1b2]"
+        ollama_replies[""] = _ollama_reply("This is not valid JSON")
 
-        with respx.mock:
-            # Mock response with invalid JSON
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": "This is not valid JSON"
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
+        result_raw = await verification_agent.check_for_leaks(redacted_text)
 
-            # Should still return something (main.py handles parsing)
-            assert result_raw is not None
+        # Should still return something (main.py handles parsing)
+        assert result_raw is not None
 
     @pytest.mark.asyncio
-    async def test_check_for_leaks_500_error(self, verification_agent):
+    async def test_check_for_leaks_500_error(self, verification_agent, ollama_replies):
         """Test handling of HTTP 500 error from Ollama."""
         redacted_text = "Contact [REDACTED_a1b2]"
+        ollama_replies[""] = _SERVER_ERROR_RESP
 
-        with respx.mock:
-            # Mock 500 error
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(500, json={"error": "Internal server error"})
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
+        result_raw = await verification_agent.check_for_leaks(redacted_text)
 
-            # Should handle gracefully (returns JSON string with error)
-            assert result_raw is not None
-            if isinstance(result_raw, str):
-                result = json.loads(result_raw)
-                assert "error" in result or result.get("leaked") is False
+        # Should handle gracefully (returns JSON string with error)
+        assert result_raw is not None
+        result = jsonutil.loads(result_raw)
+        assert "error" in result or result.get("leaked") is False
 
     @pytest.mark.asyncio
-    async def test_prompt_contains_text(self, verification_agent):
+    async def test_prompt_contains_text(self, verification_agent, ollama_route):
         """Test that the prompt includes the redacted text."""
         redacted_text = "Unique text 12345"
 
-        with respx.mock:
-            request_data = None
-
-            def capture_request(request):
-                nonlocal request_data
-                request_data = json.loads(request.content)
-                return Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-
-            respx.post("http://ollama:11434/api/generate").mock(
-                side_effect=capture_request
-            )
-
-            await verification_agent.check_for_leaks(redacted_text)
+        await verification_agent.check_for_leaks(redacted_text)
 
-            # Verify the text was included in prompt
-            assert request_data is not None
-            assert "Unique text 12345" in request_data["prompt"]
+        # Verify the text was included in prompt
+        request_data = jsonutil.loads(ollama_route.calls.last.request.content)
+        assert "Unique text 12345" in request_data["prompt"]
 
     @pytest.mark.asyncio
-    async def test_uses_correct_model(self, verification_agent):
+    async def test_uses_correct_model(self, verification_agent, ollama_route):
         """Test that the correct model is specified in request."""
         redacted_text = "Test"
 
-        with respx.mock:
-            request_data = None
-
-            def capture_request(request):
-                nonlocal request_data
-                request_data = json.loads(request.content)
-                return Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Clean"}'}
-                )
-
-            respx.post("http://ollama:11434/api/generate").mock(
-                side_effect=capture_request
-            )
-
-            await verification_agent.check_for_leaks(redacted_text)
+        await verification_agent.check_for_leaks(redacted_text)
 
-            # Verify model is phi3
-            assert request_data is not None
-            assert request_data["model"] == "phi3"
-            assert request_data["stream"] is False
-            assert request_data["format"] == "json"
+        # Verify model is phi3
+        request_data = jsonutil.loads(ollama_route.calls.last.request.content)
+        assert request_data["model"] == "phi3"
+        assert request_data["stream"] is True
+        assert request_data["format"] == "json"
 
     @pytest.mark.asyncio
-    async def test_empty_text_handling(self, verification_agent):
+    async def test_empty_text_handling(self, verification_agent, ollama_replies):
         """Test handling of empty text."""
         redacted_text = ""
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "Empty text"}')
 
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "Empty text"}'}
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
-            assert result_raw is not None
+        result_raw = await verification_agent.check_for_leaks(redacted_text)
+        assert result_raw is not None
 
     @pytest.mark.asyncio
-    async def test_very_long_text(self, verification_agent):
+    async def test_very_long_text(self, verification_agent, ollama_replies):
         """Test handling of very long redacted text."""
-        # Create long text
-        redacted_text = "Text " + "[REDACTED_xxxx] " * 1000
+        redacted_text = _LONG_REDACTED_TEXT
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "All redacted"}')
 
-        with respx.mock:
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={"response": '{"leaked": false, "reason": "All redacted"}'}
-                )
-            )
+        result_raw = await verification_agent.check_for_leaks(redacted_text)
+        assert result_raw is not None
+
+    @pytest.mark.asyncio
+    async def test_repeated_text_reuses_cached_verdict(self, verification_agent, ollama_route, ollama_replies):
+        """Test that an identical re-audit is answered without calling Ollama again."""
+        redacted_text = "Contact [REDACTED_a1b2] at [REDACTED_c3d4]"
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "All PII properly redacted"}')
 
-            result_raw = await verification_agent.check_for_leaks(redacted_text)
-            assert result_raw is not None
+        first = await verification_agent.check_for_leaks(redacted_text)
+        second = await verification_agent.check_for_leaks(redacted_text)
+        risk = await verification_agent.check_for_leaks(redacted_text, risk_mode=True)
 
-    # ========================================================================
-    # Risk Scoring Tests (GenAI Enhancement)
-    # ========================================================================
+        assert second == first
+        # Risk mode is a different question, so it goes to the LLM
+        assert ollama_route.call_count == 2
+        assert risk is not None
 
     @pytest.mark.asyncio
-    async def test_risk_scoring_low_risk(self, verification_agent):
-        """Test risk scoring mode with low risk text."""
-        redacted_text = "Contact [REDACTED_a1b2c3] at [REDACTED_d4e5f6]"
+    async def test_texts_differing_only_in_token_ids_share_verdict(self, verification_agent, ollama_route):
+        """Test that fresh token ids for the same redacted shape hit the cache."""
+        first = await verification_agent.check_for_leaks("Contact [REDACTED_a1b2] now")
+        second = await verification_agent.check_for_leaks("Contact [REDACTED_c3d4] now")
+        other = await verification_agent.check_for_leaks("Email [REDACTED_c3d4] now")
 
-        with respx.mock:
-            # Mock risk scoring response
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": json.dumps({
-                            "risk_score": 0.15,
-                            "risk_factors": ["All PII properly tokenized", "No visible identifiers"],
-                            "recommended_action": "allow",
-                            "confidence": 0.95
-                        })
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text, risk_mode=True)
-
-            # Parse result
-            if isinstance(result_raw, str):
-                result = json.loads(result_raw)
-            else:
-                result = result_raw
-
-            assert result["risk_score"] == 0.15
-            assert result["recommended_action"] == "allow"
-            assert result["confidence"] == 0.95
-            assert len(result["risk_factors"]) > 0
+        assert second == first
+        assert ollama_route.call_count == 2
+        assert other is not None
 
     @pytest.mark.asyncio
-    async def test_risk_scoring_medium_risk(self, verification_agent):
-        """Test risk scoring mode with medium risk text."""
-        redacted_text = "Patient [REDACTED_a1b2], DOB: [REDACTED_c3d4]"
+    async def test_errors_are_not_cached(self, verification_agent, ollama_route, ollama_replies):
+        """Test that a failed audit is retried on the next call."""
+        redacted_text = "Contact [REDACTED_a1b2]"
 
-        with respx.mock:
-            # Mock medium risk response
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": json.dumps({
-                            "risk_score": 0.45,
-                            "risk_factors": [
-                                "Token adjacency suggests PHI relationship",
-                                "Contextual word 'Patient' links tokens"
-                            ],
-                            "recommended_action": "allow",
-                            "confidence": 0.88
-                        })
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text, risk_mode=True)
-            result = json.loads(result_raw) if isinstance(result_raw, str) else result_raw
-
-            assert 0.3 <= result["risk_score"] <= 0.5
-            assert result["recommended_action"] == "allow"
-            assert "Token adjacency" in result["risk_factors"][0]
+        ollama_replies[""] = _SERVER_ERROR_RESP
+        failed = jsonutil.loads(await verification_agent.check_for_leaks(redacted_text))
+        ollama_replies[""] = _ollama_reply('{"leaked": false, "reason": "Clean"}')
+        retried = jsonutil.loads(await verification_agent.check_for_leaks(redacted_text))
 
-    @pytest.mark.asyncio
-    async def test_risk_scoring_high_risk(self, verification_agent):
-        """Test risk scoring mode with high risk text."""
-        redacted_text = "SSN: XXX-XX-1234, Phone: (555) XXX-XXXX"
+        assert "error" in failed
+        assert retried["leaked"] is False
+        assert ollama_route.call_count == 2
 
-        with respx.mock:
-            # Mock high risk response
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": json.dumps({
-                            "risk_score": 0.65,
-                            "risk_factors": [
-                                "Format preservation: SSN pattern visible",
-                                "Format preservation: Phone pattern visible",
-                                "Partial SSN exposed (last 4 digits)"
-                            ],
-                            "recommended_action": "alert",
-                            "confidence": 0.92
-                        })
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(redacted_text, risk_mode=True)
-            result = json.loads(result_raw) if isinstance(result_raw, str) else result_raw
-
-            assert 0.5 <= result["risk_score"] <= 0.7
-            assert result["recommended_action"] == "alert"
-            assert any("Format preservation" in factor for factor in result["risk_factors"])
+    # ========================================================================
+    # Risk Scoring Tests (GenAI Enhancement)
+    # ========================================================================
 
     @pytest.mark.asyncio
-    async def test_risk_scoring_critical_risk(self, verification_agent):
-        """Test risk scoring mode with critical risk (PII leak)."""
-        leaked_text = "Contact John Doe at john.doe@email.com or 555-123-4567"
-
-        with respx.mock:
-            # Mock critical risk response
-            respx.post("http://ollama:11434/api/generate").mock(
-                return_value=Response(
-                    200,
-                    json={
-                        "response": json.dumps({
-                            "risk_score": 0.95,
-                            "risk_factors": [
-                                "Direct PII leak: full name 'John Doe'",
-                                "Direct PII leak: email 'john.doe@email.com'",
-                                "Direct PII leak: phone '555-123-4567'"
-                            ],
-                            "recommended_action": "purge",
-                            "confidence": 0.98
-                        })
-                    }
-                )
-            )
-
-            result_raw = await verification_agent.check_for_leaks(leaked_text, risk_mode=True)
-            result = json.loads(result_raw) if isinstance(result_raw, str) else result_raw
-
-            assert result["risk_score"] >= 0.7
-            assert result["recommended_action"] == "purge"
-            assert any("Direct PII leak" in factor for factor in result["risk_factors"])
+    @pytest.mark.parametrize(
+        "redacted_text,reply,score_range,factor_marker",
+        [
+            pytest.param(
+                "Contact [REDACTED_a1b2c3] at [REDACTED_d4e5f6]",
+                {
+                    "risk_score": 0.15,
+                    "risk_factors": ["All PII properly tokenized", "No visible identifiers"],
+                    "recommended_action": "allow",
+                    "confidence": 0.95
+                },
+                (0.0, 0.3),
+                "properly tokenized",
+                id="low",
+            ),
+            pytest.param(
+                "Patient [REDACTED_a1b2], DOB: [REDACTED_c3d4]",
+                {
+                    "risk_score": 0.45,
+                    "risk_factors": [
+                        "Token adjacency suggests PHI relationship",
+                        "Contextual word 'Patient' links tokens"
+                    ],
+                    "recommended_action": "allow",
+                    "confidence": 0.88
+                },
+                (0.3, 0.5),
+                "Token adjacency",
+                id="medium",
+            ),
+            pytest.param(
+                "SSN: XXX-XX-1234, Phone: (555) XXX-XXXX",
+                {
+                    "risk_score": 0.65,
+                    "risk_factors": [
+                        "Format preservation: SSN pattern visible",
+                        "Format preservation: Phone pattern visible",
+                        "Partial SSN exposed (last 4 digits)"
+                    ],
+                    "recommended_action": "alert",
+                    "confidence": 0.92
+                },
+                (0.5, 0.7),
+                "Format preservation",
+                id="high",
+            ),
+            pytest.param(
+                "Contact John Doe at john.doe@email.com or 555-123-4567",
+                {
+                    "risk_score": 0.95,
+                    "risk_factors": [
+                        "Direct PII leak: full name 'John Doe'",
+                        "Direct PII leak: email 'john.doe@email.com'",
+                        "Direct PII leak: phone '555-123-4567'"
+                    ],
+                    "recommended_action": "purge",
+                    "confidence": 0.98
+                },
+                (0.7, 1.0),
+                "Direct PII leak",
+                id="critical",
+            ),
+        ],
+    )
+    async def test_risk_scoring_levels(
+        self, verification_agent, ollama_replies, redacted_text, reply, score_range, factor_marker
+    ):
+        """Test risk scoring mode returns the model's score, action and factors per risk tier."""
+        ollama_replies[""] = _ollama_reply(reply)
+
+        result = jsonutil.loads(await verification_agent.check_for_leaks(redacted_text, risk_mode=True))
+
+        assert result == reply
+        assert score_range[0] <= result["risk_score"] <= score_range[1]
+        assert any(factor_marker in factor for factor in result["risk_factors"])
 
     @pytest.mark.asyncio
-    async def test_risk_scoring_with_prompt_version_override(self, verification_agent):
+    async def test_risk_scoring_with_prompt_version_override(self, verification_agent, ollama_route, ollama_replies):
         """Test risk scoring with different prompt versions."""
         redacted_text = "Contact [REDACTED_a1b2]"
-
-        with respx.mock:
-            request_data = None
-
-            def capture_request(request):
-                nonlocal request_data
-                request_data = json.loads(request.content)
-                return Response(
-                    200,
-                    json={
-                        "response": json.dumps({
-                            "risk_score": 0.1,
-                            "risk_factors": ["Clean"],
-                            "recommended_action": "allow",
-                            "confidence": 0.95
-                        })
-                    }
-                )
-
-            respx.post("http://ollama:11434/api/generate").mock(side_effect=capture_request)
-
-            await verification_agent.check_for_leaks(
-                redacted_text,
-                prompt_version="v4_optimized",
-                risk_mode=True
-            )
-
-            # Verify the prompt was generated (different version would have different content)
-            assert request_data is not None
-            assert "prompt" in request_data
+        ollama_replies[""] = _ollama_reply({
+            "risk_score": 0.1,
+            "risk_factors": ["Clean"],
+            "recommended_action": "allow",
+            "confidence": 0.95
+        })
+
+        await verification_agent.check_for_leaks(
+            redacted_text,
+            prompt_version="v4_optimized",
+            risk_mode=True
+        )
+
+        # Verify the prompt was generated (different version would have different content)
+        request_data = jsonutil.loads(ollama_route.calls.last.request.content)
+        assert "prompt" in request_data